@@ -7,6 +7,7 @@ import matplotlib.pyplot as plt
 import seaborn as sns
 
 # statistics
+from functools import lru_cache
 from statistics import mean 
 import statsmodels.api as sm
 from statsmodels.formula.api import ols
@@ -17,6 +18,7 @@ from statsmodels.stats.anova import AnovaRM
 from statsmodels.stats.multicomp import pairwise_tukeyhsd
 from statsmodels.stats.multicomp import MultiComparison
 from statsmodels.stats.libqsturng import psturng
+from statsmodels.sandbox.stats.multicomp import get_tukeyQcrit2
 
 
 def combine_midflight(row):
@@ -28,10 +30,17 @@ def combine_midflight(row):
     
 
 def scipy_anova_post_hoc_tests(df=None, flight_status_col='flight status new',
-                               sig_test=stats.f_oneway):
+                               sig_test=stats.f_oneway, batch=False, target='count per cell', alpha=0.05):
     """
     df should be melted by aberration type
+    
+    batch=True skips the per aberration loop & printing & returns (anova_df, tukey_df) from
+    batch_anova_post_hoc_tests instead (one way ANOVA only, sig_test isn't used)
     """
+    if batch:
+        return batch_anova_post_hoc_tests(df, by='aberration type', flight_status_col=flight_status_col, 
+                                          target=target, alpha=alpha)
+    
     # make list of aberrations
     aberrations = list(df['aberration type'].unique())
     
@@ -46,10 +55,144 @@ def scipy_anova_post_hoc_tests(df=None, flight_status_col='flight status new',
 
         # if anova detects sig diff, perform post-hoc tests            
         if p_value <= 0.05:
-            mc = MultiComparison(df[df['aberration type'] == aberr]['count per cell'], 
-                                 df[df['aberration type'] == aberr][flight_status_col])
-            mc_results = mc.tukeyhsd()
-            print(mc_results)
-            res = mc_results
-            print(f'pvalues: {list(psturng(np.abs(res.meandiffs / res.std_pairs), len(res.groupsunique), res.df_total))}')
-            print('\n')
\ No newline at end of file
+            stats_df = group_sufficient_stats(df[df['aberration type'] == aberr], [flight_status_col], target)
+            tukey_df = tukey_hsd_from_sufficient_stats(stats_df, flight_status_col)
+            print(tukey_df)
+            print(f'pvalues: {list(tukey_df["p value"])}')
+            print('\n')
+
+
+# group_sufficient_stats through tukey_hsd_from_sufficient_stats are also in telomere_methods_astros.py, keep both copies the same
+def group_sufficient_stats(df=None, group_cols=['aberration type', 'flight status new'], target='count per cell'):
+    """
+    n, sum & sum of squares of target per group, from one groupby over df (or summed from a table that isn't a 
+    dataframe but has an aggregate(group_cols) method, i.e telomere_methods_astros.telomere_sufficient_stats)
+    """
+    if not isinstance(df, pd.DataFrame):
+        return df.aggregate(group_cols)
+    
+    values = df[target].astype('float64')
+    grouped = pd.DataFrame({'value': values, 'value squared': values ** 2})
+    for col in group_cols:
+        grouped[col] = df[col]
+    grouped = grouped.dropna(subset=['value']).groupby(group_cols, sort=False, observed=True)
+    
+    stats_df = pd.concat([grouped['value'].count(), grouped['value'].sum(), grouped['value squared'].sum()], axis=1)
+    stats_df.columns = ['n', 'sum', 'sum of squares']
+    return stats_df.reset_index()
+
+
+def anova_from_sufficient_stats(stats_df=None, by='aberration type', flight_status_col='flight status new',
+                                levels=['Pre-Flight', 'Mid-Flight', 'Post-Flight']):
+    """
+    one way ANOVA between the levels of flight_status_col for every group of by (the whole table if None), w/ 
+    sums of squares computed from the group_sufficient_stats table in one vectorized pass (same F & p value 
+    as stats.f_oneway)
+    """
+    if not isinstance(stats_df, pd.DataFrame):
+        stats_df = group_sufficient_stats(stats_df, [flight_status_col] if by is None else [by, flight_status_col])
+    stats_df = stats_df[stats_df['n'] > 0]
+    if levels is not None:
+        stats_df = stats_df[stats_df[flight_status_col].isin(levels)]
+    
+    stats_df = stats_df.assign(**{'sum sq over n': stats_df['sum'] ** 2 / stats_df['n']})
+    totals = stats_df.groupby(np.zeros(len(stats_df)) if by is None else by, sort=False, observed=True)
+    totals = totals.agg({flight_status_col: 'count', 'n': 'sum', 'sum': 'sum', 'sum of squares': 'sum', 'sum sq over n': 'sum'})
+    
+    n_groups, n_total = totals[flight_status_col], totals['n']
+    ss_between = totals['sum sq over n'] - totals['sum'] ** 2 / n_total
+    ss_within = totals['sum of squares'] - totals['sum sq over n']
+    df_between, df_within = n_groups - 1, n_total - n_groups
+    
+    with np.errstate(invalid='ignore', divide='ignore'):
+        f_stat = (ss_between / df_between) / (ss_within / df_within)
+    
+    anova_df = pd.DataFrame({'groups': n_groups, 'n': n_total, 'df between': df_between, 'df within': df_within,
+                             'F statistic': f_stat, 'p value': stats.f.sf(f_stat, df_between, df_within)})
+    if by is None:
+        return anova_df.reset_index(drop=True)
+    return anova_df.reset_index()
+
+
+def batch_anova_post_hoc_tests(df=None, by='aberration type', flight_status_col='flight status new', 
+                               target='count per cell', alpha=0.05):
+    """
+    one way ANOVA between Pre/Mid/Post-Flight for every group of by (e.g every aberration type; None for the 
+    whole df) at once (see anova_from_sufficient_stats), then Tukey HSD for the groups w/ p value <= alpha
+    
+    returns (anova_df, tukey_df); tukey_df has one row per pair of flight statuses of each significant group
+    """
+    group_cols = [flight_status_col] if by is None else [by, flight_status_col]
+    stats_df = group_sufficient_stats(df, group_cols, target)
+    anova_df = anova_from_sufficient_stats(stats_df, by, flight_status_col)
+    
+    # post hoc from the same table, only for the significant groups
+    significant = anova_df['p value'] <= alpha
+    if by is None:
+        stats_df = stats_df if significant.any() else stats_df.iloc[:0]
+    else:
+        stats_df = stats_df[stats_df[by].isin(anova_df[significant][by])]
+    
+    tukey_df = tukey_hsd_from_sufficient_stats(stats_df, flight_status_col, by=by, alpha=alpha)
+    return anova_df, tukey_df
+
+
+@lru_cache(maxsize=None)
+def studentized_range_critical_value(n_groups, df_within, alpha=0.05):
+    # statsmodels' own critical value for tukeyhsd (qsturng or scipy's studentized_range depending on the version), 
+    # slow to compute & the same (groups, df) repeat across families, so critical values are cached
+    return get_tukeyQcrit2(n_groups, df_within, alpha=alpha)
+
+
+def tukey_hsd_from_sufficient_stats(stats_df=None, group_col='flight status new', by=None, alpha=0.05):
+    """
+    Tukey HSD between the groups of group_col w/in each group of by (the whole table if None), from a 
+    group_sufficient_stats table instead of the raw values: same mean diffs, critical value, intervals & reject 
+    as MultiComparison(...).tukeyhsd(). p values of every pair of every family come from one psturng call & are 
+    an approximation: psturng bounds them between 0.001 & 0.9 (so p < 0.001 is reported as 0.001), which can 
+    differ from the p-adj of newer statsmodels versions; use reject / the intervals for the decision at alpha
+    
+    returns one row per pair: by, group 1, group 2, mean diff, p value, lower, upper, reject
+    """
+    if not isinstance(stats_df, pd.DataFrame):
+        stats_df = group_sufficient_stats(stats_df, [group_col] if by is None else [by, group_col])
+    stats_df = stats_df[stats_df['n'] > 0]
+    families = [(None, stats_df)] if by is None else stats_df.groupby(by, sort=False, observed=True)
+    
+    tukey_rows = []
+    for family, family_df in families:
+        family_df = family_df.sort_values(group_col)
+        n = family_df['n'].to_numpy(dtype='float64')
+        sums = family_df['sum'].to_numpy(dtype='float64')
+        df_within = int(n.sum()) - len(n)
+        if len(n) < 2 or df_within < 1:
+            continue
+        
+        means = sums / n
+        mse = (family_df['sum of squares'].to_numpy(dtype='float64') - sums * means).sum() / df_within
+        
+        # pairs in the same order as statsmodels
+        i, j = np.triu_indices(len(n), 1)
+        meandiffs = means[j] - means[i]
+        std_pairs = np.sqrt(mse / 2 * (1 / n[i] + 1 / n[j]))
+        half_width = studentized_range_critical_value(len(n), df_within, alpha) * std_pairs
+        
+        groups = family_df[group_col].to_numpy()
+        for pair in range(len(i)):
+            tukey_rows.append([family, groups[i[pair]], groups[j[pair]], meandiffs[pair], 
+                               np.abs(meandiffs[pair] / std_pairs[pair]), len(n), df_within,
+                               meandiffs[pair] - half_width[pair], meandiffs[pair] + half_width[pair], 
+                               np.abs(meandiffs[pair]) > half_width[pair]])
+    
+    tukey_df = pd.DataFrame(tukey_rows, columns=[by or 'group', 'group 1', 'group 2', 'mean diff', 'q', 'groups', 
+                                                 'df within', 'lower', 'upper', 'reject'])
+    if len(tukey_df):
+        tukey_df['p value'] = np.atleast_1d(psturng(tukey_df['q'].to_numpy(), tukey_df['groups'].to_numpy(), 
+                                                    tukey_df['df within'].to_numpy()))
+    else:
+        tukey_df['p value'] = []
+    
+    tukey_df = tukey_df[[by or 'group', 'group 1', 'group 2', 'mean diff', 'p value', 'lower', 'upper', 'reject']]
+    if by is None:
+        tukey_df = tukey_df.drop('group', axis=1)
+    return tukey_df
@@ -1,8 +1,16 @@
 # enables access to directories/files
 import os
+import hashlib
+import zlib
+import zipfile
+
+# parallel processing
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial, lru_cache
 
 # for handling data
 import numpy as np
+import openpyxl
 from numpy import array
 import pandas as pd
 from pandas import ExcelWriter
@@ -32,8 +40,11 @@ from statsmodels.stats.multicomp import MultiComparison
 import scikit_posthocs as sp
 from statsmodels.stats.anova import AnovaRM
 from statsmodels.stats.libqsturng import psturng
+from statsmodels.sandbox.stats.multicomp import get_tukeyQcrit2
+from statsmodels.stats.multitest import multipletests
 
 import re
+import itertools
 from ast import literal_eval
 import more_itertools
 import math
@@ -68,7 +79,25 @@ from matplotlib import lines
 from matplotlib.offsetbox import AnchoredText
 
 
-def generate_dictionary_for_telomere_length_data(patharg):
+# layout of the telometer excel template, in pd.read_excel row labels (excel row = label + 2):
+# each metaphase (cell) is a block of rows_per_cell rows starting w/ a DAPI counterstain row, then the 
+# cell's telomeres from first_telo_offset rows below it. the per cell means column lists n_cells rows.
+TELOMETER_TEMPLATE = {'n_cells': 30,
+                      'telos_per_cell': 184,
+                      'rows_per_cell': 187,
+                      'dapi_row': 5,
+                      'first_telo_offset': 3}
+
+# average of all cy3 calibrated control telo measurements (11 age matched controls); per cell means are 
+# reported relative to it
+CONTROL_MEAN_TELOMERE_LENGTH = 116.1848153
+
+# sample ID -> imaging session -> Cy3 bead value the sample's telomeres are divided by
+CY3_CALIBRATION_TABLE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'cy3_calibration_table.csv')
+
+
+def generate_dictionary_for_telomere_length_data(patharg, n_workers=None, cache_dir=None, template=None,
+                                                  calibration_table=None, sufficient_stats=None):
   
     """
     USAGE:
@@ -84,126 +113,532 @@ def generate_dictionary_for_telomere_length_data(patharg):
     is associated with its respective individual telomere length data (VALUE) as a KEY:VALUE pair 
     in the dictionary. The dictionary can then be looped over to initialize all timepoint data
     for that individual for analysis, i.e visualizations, statistics, etc.
+
+    Passing n_workers > 1 parses the excel files in a pool of that many processes; 
+    the returned dictionary is the same as the serial version. Passing cache_dir keeps the cleaned, 
+    uncalibrated telomeres per file in that directory, so unchanged excel files aren't parsed again.
+    template describes the excel layout (see TELOMETER_TEMPLATE), i.e for slides w/ more metaphases.
+    calibration_table is the Cy3 registry (see load_cy3_calibration_table), by default CY3_CALIBRATION_TABLE.
+    If a telomere_sufficient_stats is passed as sufficient_stats, it's updated w/ the calibrated telomeres.
     """
     
-    # initialize dictionary to hold our data
-    dict_astro_individ_telos_dfs = {}
+    dict_astro_individ_telos_dfs = collect_telomere_data_from_directory(patharg, extract_individ_telos_from_file,
+                                                                        n_workers=n_workers, cache_dir=cache_dir,
+                                                                        extractor_kwargs={'template': template})
+    if isinstance(dict_astro_individ_telos_dfs, int):
+        return dict_astro_individ_telos_dfs
+    
+    dict_astro_individ_telos_dfs = apply_cy3_calibration(dict_astro_individ_telos_dfs, calibration_table)
+    if sufficient_stats is not None:
+        sufficient_stats.update(dict_astro_individ_telos_dfs)
+
+    print('Done collecting all astronaut telomere length excel files')
+    return dict_astro_individ_telos_dfs
+
 
-    # loop through directory to grab files
-    for file in os.scandir(patharg):
-        if file.name.endswith('.xlsx') and file.name.startswith('~$') == False:
-            print(f'{file.name} telomere data acquisition in progress..')
+def collect_telomere_data_from_directory(patharg, extractor, n_workers=None, cache_dir=None, extractor_kwargs=None):
+    """
+    Loops through the telometer excel files in patharg & hands each one to extractor, which must be a
+    module level function taking (file_path, file_name, **extractor_kwargs) & returning the cleaned data for 
+    that file, or None if the file couldn't be read. With n_workers > 1 the files are parsed in a process pool; results are 
+    collected in directory order so the returned {file name w/o .xlsx: data} dictionary matches the serial loop.
+    
+    If cache_dir is given, extracted data is stored there per file & reused as long as the excel file is 
+    unchanged (see load_telomere_data_from_cache); only new or modified files are parsed.
+    """
+    
+    files = [(file.path, file.name) for file in os.scandir(patharg) 
+             if file.name.endswith('.xlsx') and file.name.startswith('~$') == False]
+    
+    # extractor options change the extracted data, so they're part of the cache tag
+    if extractor_kwargs is None:
+        extractor_kwargs = {}
+    cache_tag = f'{extractor.__name__} v{TELOMERE_CACHE_VERSION}'
+    if extractor_kwargs:
+        cache_tag += ' ' + hashlib.sha1(repr(sorted(extractor_kwargs.items())).encode('utf-8')).hexdigest()[:8]
+    extractor = partial(extractor, **extractor_kwargs)
+    
+    # pull anything we've already parsed from the cache, the rest still needs parsing
+    extracted_data = [None] * len(files)
+    to_parse = []
+    for i, (file_path, file_name) in enumerate(files):
+        if cache_dir is not None:
+            extracted_data[i] = load_telomere_data_from_cache(cache_dir, file_path, cache_tag)
+        if extracted_data[i] is None:
+            to_parse.append(i)
+    
+    if cache_dir is not None:
+        print(f'{len(files) - len(to_parse)} of {len(files)} excel files loaded from cache')
+    
+    file_paths = [files[i][0] for i in to_parse]
+    file_names = [files[i][1] for i in to_parse]
+    
+    if n_workers is not None and n_workers > 1:
+        print(f'parsing {len(to_parse)} excel files w/ {n_workers} processes..')
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            parsed_data = list(executor.map(extractor, file_paths, file_names))
+    else:
+        parsed_data = []
+        for file_path, file_name in zip(file_paths, file_names):
+            print(f'{file_name} telomere data acquisition in progress..')
+            parsed_data.append(extractor(file_path, file_name))
+    
+    for i, data in zip(to_parse, parsed_data):
+        extracted_data[i] = data
+        if cache_dir is not None and data is not None:
+            save_telomere_data_to_cache(cache_dir, files[i][0], cache_tag, data)
+    
+    file_names = [file_name for file_path, file_name in files]
+    dict_telos_dfs = {}
+    for file_name, data in zip(file_names, extracted_data):
+        if data is None:
+            print(f'{file_name} File not found..')
+            return -1
         
-            try:
-                df = pd.read_excel(file)
+        file_name_trimmed = file_name.replace('.xlsx', '')
+        dict_telos_dfs[file_name_trimmed] = data
+        
+    return dict_telos_dfs
 
-            except:
-                print(f'{file.name} File not found..')
-                return -1
 
-            df.rename(columns={'Unnamed: 3':'Individ Telos'}, inplace=True)
-            
-            # these numbers correspond to rows containing information about the DAPI counterstain, NOT telomeres, so we drop
-            DAPI_values_to_drop=[5, 192, 379, 566, 753, 940, 1127, 1314, 1501, 1688, 1875, 2062,
-                    2249, 2436, 2623, 2810, 2997, 3184, 3371, 3558, 3745, 3932, 4119, 4306, 4493, 
-                    4680, 4867, 5054, 5241, 5428]
-
-            # grabbing individual telomere length data from the file & dropping DAPI info
-            individual_telos_lengths = (df['Individ Telos'])
-            individual_telos_lengths = individual_telos_lengths.drop(labels=DAPI_values_to_drop)
-            
-            # first pass at generating synthetic data for github exposition; to initialize actual
-            # data, comment out the line below, and uncomment the .iloc[] line
-#             individual_telos_lengths = individual_telos_lengths.sample(2500, random_state=1)
-            individual_telos_lengths = individual_telos_lengths.iloc[7:5611]
-
-            # ensure the telomere measurements are a numeric data type, drop any missing values, 
-            # make data into a dataframe
-            telos_str_toNaN = pd.to_numeric(individual_telos_lengths, errors='coerce')
-            individual_telos_cleaned = telos_str_toNaN.dropna(axis=0, how='any')
-            telos_df = individual_telos_cleaned.to_frame(name=None)
-            
-            # remove any telomere measurements that lie beyond 3 standard deviations of the mean
-            # the data is relatively normal in shape, & this process removes about ~10-20 telos from ~5520
-            # modest loss, acceptable to help standardize
-            telos_individ_df = telos_df[(np.abs(stats.zscore(telos_df)) < 3).all(axis=1)]
-            
-            # logic clauses for recognizing which astronaut ID is in the sample name
-            # different astronauts were imaging at different times and thus associated with 
-            # different Cy3 calibrations for the microscope, thus data is standardized according to Cy3
-            
-            if ('5163' in file.name) or ('1536' in file.name):
-                telos_individ_df_cy3Cal = telos_individ_df.div(59.86)
+def extract_individ_telos_from_file(file_path, file_name, template=None, name='Individ Telos'):
+    """
+    Pulls the individual telomere lengths column out of one telometer excel file & cleans it; 
+    see generate_dictionary_for_telomere_length_data. The Cy3 calibration is applied afterwards to all
+    samples at once (apply_cy3_calibration). Returns None if the file can't be read.
+    """
+        
+    try:
+        individual_telos_lengths = read_individ_telos_column(file_path, name=name, template=template)
+
+    except:
+        return None
+
+    return clean_individ_telos(individual_telos_lengths, template=template)
+
 
-            elif '2171' in file.name or '4419' in file.name:
-                telos_individ_df_cy3Cal = telos_individ_df.div(80.5)
+def read_telometer_columns(file_path, columns=None, first_row=None, last_row=None):
+    """
+    Streams rows first_row through last_row (numbered as in excel) of the requested columns (0-based, as
+    pandas numbers them) from the first sheet of a telometer excel file, in openpyxl's read only mode.
+    Nothing outside of those rows/columns is turned into python objects & reading stops at last_row, so 
+    memory per file is bounded by the columns we actually use. Returns an object array with one row per 
+    excel row & one column per requested column; rows past the end of the sheet are left as None.
+    """
+    
+    min_col, max_col = min(columns), max(columns)
+    positions = [col - min_col for col in columns]
+    values = np.full((last_row - first_row + 1, len(columns)), None, dtype=object)
+    
+    workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+    try:
+        rows = workbook.worksheets[0].iter_rows(min_row=first_row, max_row=last_row, 
+                                                min_col=min_col + 1, max_col=max_col + 1, values_only=True)
+        for i, row in enumerate(rows):
+            values[i] = [row[pos] if pos < len(row) else None for pos in positions]
+    finally:
+        workbook.close()
+        
+    return values
 
-            elif '7673' in file.name:
-                telos_individ_df_cy3Cal = telos_individ_df.div(2.11)
 
-            elif '2479' in file.name:
-                telos_individ_df_cy3Cal = telos_individ_df.div(2.18)
+def last_telomere_row_label(template=None):
+    if template is None:
+        template = TELOMETER_TEMPLATE
+    return (template['dapi_row'] + (template['n_cells'] - 1) * template['rows_per_cell'] + 
+            template['first_telo_offset'] + template['telos_per_cell'] - 1)
 
-            elif '1261' in file.name:
-                telos_individ_df_cy3Cal = telos_individ_df.div(2.16)
 
-            else:
-                telos_individ_df_cy3Cal = telos_individ_df
+def read_individ_telos_column(file_path, name='Individ Telos', template=None):
+    # excel row 1 is the header, so label L of pd.read_excel(file)['Unnamed: 3'] is excel row L + 2;
+    # reading stops at the last telomere row of the last metaphase
+    individ_telos = read_telometer_columns(file_path, columns=[3], first_row=2, 
+                                           last_row=last_telomere_row_label(template) + 2)
+    return pd.Series(individ_telos[:, 0], name=name)
+
+
+def read_telos_per_cell_column(file_path, template=None):
+    # same labels as pd.read_excel(file, skiprows=3).iloc[:, 12]: header on excel row 4, then one row per metaphase
+    if template is None:
+        template = TELOMETER_TEMPLATE
+    telos_per_cell = read_telometer_columns(file_path, columns=[12], first_row=4, last_row=4 + template['n_cells'])
+    return per_cell_column_to_series(telos_per_cell[:, 0])
+
+
+def per_cell_column_to_series(per_cell_values):
+    # first value is the column header, as pandas would name it
+    header = per_cell_values[0]
+    return pd.Series(per_cell_values[1:], name=header if header is not None else 'Unnamed: 12')
+
+
+def telometer_telomere_row_mask(row_labels, template=None):
+    """
+    Boolean mask over pd.read_excel row labels that is True only for telomere rows of the template, i.e
+    rows first_telo_offset to first_telo_offset + telos_per_cell - 1 below each of the n_cells DAPI rows. 
+    DAPI rows (information about the DAPI counterstain, NOT telomeres) & everything past the last metaphase are False.
+    """
+    
+    if template is None:
+        template = TELOMETER_TEMPLATE
+        
+    offset = np.asarray(row_labels) - template['dapi_row']
+    cell_number = offset // template['rows_per_cell']
+    row_in_cell = offset % template['rows_per_cell']
+    
+    return ((offset >= 0) & (cell_number < template['n_cells']) &
+            (row_in_cell >= template['first_telo_offset']) & 
+            (row_in_cell < template['first_telo_offset'] + template['telos_per_cell']))
+
+
+def clean_individ_telos(individual_telos_lengths, template=None):
+    """
+    Takes the individual telomere lengths column from a telometer excel file (labeled the same as
+    pd.read_excel labels rows) & returns a single column dataframe of the cleaned, uncalibrated telomeres.
+    """
+
+    # grabbing individual telomere length data from the file, keeping only telomere rows (drops DAPI info)
+    individual_telos_lengths = individual_telos_lengths[telometer_telomere_row_mask(individual_telos_lengths.index, 
+                                                                                    template=template)]
+    
+    # first pass at generating synthetic data for github exposition; to initialize synthetic
+    # data, uncomment the line below
+#     individual_telos_lengths = individual_telos_lengths.sample(2500, random_state=1)
+
+    # ensure the telomere measurements are a numeric data type, drop any missing values, 
+    # make data into a dataframe
+    telos_str_toNaN = pd.to_numeric(individual_telos_lengths, errors='coerce')
+    individual_telos_cleaned = telos_str_toNaN.dropna(axis=0, how='any')
+    telos_df = individual_telos_cleaned.to_frame()
+    
+    # remove any telomere measurements that lie beyond 3 standard deviations of the mean
+    # the data is relatively normal in shape, & this process removes about ~10-20 telos from ~5520
+    # modest loss, acceptable to help standardize
+    telos_individ_df = telos_df[(np.abs(stats.zscore(telos_df)) < 3).all(axis=1)]
+    return telos_individ_df
+
+
+def clean_telos_per_cell(telos_per_cell, template=None):
+    # mean telomere length per metaphase, one row per cell under the per cell header
+    if template is None:
+        template = TELOMETER_TEMPLATE
+    telos_per_cell = pd.to_numeric(telos_per_cell.iloc[0:template['n_cells']], errors='coerce')
+    return telos_per_cell.to_frame().dropna(axis=0, how='any')
+
+
+def load_cy3_calibration_table(calibration_table=None):
+    """
+    Reads the Cy3 calibration registry: one row per sample ID w/ the imaging session it was imaged in & 
+    that session's Cy3 bead value. Different astronauts/controls were imaged at different times and thus 
+    associated with different Cy3 calibrations for the microscope, thus data is standardized according to Cy3.
+    calibration_table can be a path to the .csv or an already loaded dataframe; defaults to CY3_CALIBRATION_TABLE.
+    New imaging sessions only need new rows in the table.
+    """
+    
+    if calibration_table is None:
+        calibration_table = CY3_CALIBRATION_TABLE
+    if isinstance(calibration_table, pd.DataFrame):
+        return calibration_table
+    
+    # IDs keep their leading zeros, i.e control 0397
+    calibration_table = pd.read_csv(calibration_table, dtype={'sample id': str, 'imaging session': str})
+    
+    # a divisor belongs to an imaging session, so every sample from one session must agree
+    divisors_per_session = calibration_table.groupby('imaging session')['cy3 calibration'].nunique()
+    if (divisors_per_session > 1).any():
+        raise ValueError(f'imaging sessions w/ more than one Cy3 calibration: '
+                         f'{list(divisors_per_session[divisors_per_session > 1].index)}')
+    if calibration_table['sample id'].duplicated().any():
+        raise ValueError(f'sample IDs listed more than once: '
+                         f'{list(calibration_table.loc[calibration_table["sample id"].duplicated(), "sample id"])}')
+    return calibration_table
+
+
+def get_cy3_calibration(file_name, calibration_table=None):
+    """
+    Returns the Cy3 bead value the sample's telomeres are divided by (1 if the sample isn't in the registry).
+    The sample ID is characters 3-7 of the file name, i.e dso5163 / ctl0397.
+    """
+    
+    calibration_table = load_cy3_calibration_table(calibration_table)
+    cy3_by_sample = calibration_table.set_index('sample id')['cy3 calibration']
+    return float(cy3_by_sample.get(file_name[3:7], 1))
+
+
+def apply_cy3_calibration(dict_telos_dfs, calibration_table=None, divide_by=None):
+    """
+    Divides every sample's telomeres in {file name: single column dataframe} by its Cy3 calibration (and then 
+    by divide_by, if given) in one vectorized division over the concatenated values of all samples. 
+    Returns a new telomere_sample_dict w/ the same keys, indexes & column names.
+    """
+    
+    calibration_table = load_cy3_calibration_table(calibration_table)
+    cy3_by_sample = calibration_table.set_index('sample id')['cy3 calibration']
+    
+    file_names = list(dict_telos_dfs.keys())
+    if len(file_names) == 0:
+        return telomere_sample_dict()
+    
+    telos_dfs = [dict_telos_dfs[file_name] for file_name in file_names]
+    lengths = np.array([len(telos_df) for telos_df in telos_dfs])
+    divisors = cy3_by_sample.reindex([file_name[3:7] for file_name in file_names]).fillna(1).to_numpy(dtype='float64')
+    
+    all_telos = np.concatenate([telos_df.iloc[:, 0].to_numpy(dtype='float64') for telos_df in telos_dfs])
+    all_telos_cy3Cal = all_telos / np.repeat(divisors, lengths)
+    if divide_by is not None:
+        all_telos_cy3Cal = all_telos_cy3Cal / divide_by
+    
+    split_telos = np.split(all_telos_cy3Cal, np.cumsum(lengths)[:-1])
+    return telomere_sample_dict((file_name, pd.DataFrame({telos_df.columns[0]: telos}, index=telos_df.index))
+                                for file_name, telos_df, telos in zip(file_names, telos_dfs, split_telos))
+
+
+def parse_sample_key(name_key):
+    """
+    (astro id, timepoint) of a sample from its file name, i.e 'dso5163 L-270 mphase TeloFISH' or 'dso1062_L-180' 
+    -> ('5163', 'L-270') / ('1062', 'L-180'). The ID is characters 3-7 as in make_*_dataframe; the timepoint is the 
+    word of the name (split on spaces & underscores) that's a known timepoint.
+    """
+    
+    for word in re.split(r'[ _]+', name_key.replace('.xlsx', '')):
+        if word in TIMEPOINT_ORDER:
+            return name_key[3:7], word
+    return name_key[3:7], None
+
+
+class telomere_sample_dict(dict):
+    """
+    {file name: telomere data} as returned by the ingest functions, carrying an index of 
+    (astro id, timepoint) -> file name parsed once from the names (see parse_sample_key), so samples 
+    are fetched by key instead of scanning every file name for substrings.
+    """
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.sample_index = {}
+        for name_key in self:
+            self._index_sample(name_key)
+    
+    def _sample_index(self):
+        # also covers unpickling, which fills the dict before __init__'s attributes exist
+        return self.__dict__.setdefault('sample_index', {})
+    
+    def _index_sample(self, name_key):
+        # two files parsing to the same (astro id, timepoint) would silently shadow each other, i.e two timepoints 
+        # of one astronaut whose timepoint isn't parsed from the name
+        sample_key = parse_sample_key(name_key)
+        indexed_name = self._sample_index().get(sample_key)
+        if indexed_name is not None and indexed_name != name_key and indexed_name in self:
+            print(f'{name_key} & {indexed_name} both parse to (astro id, timepoint) {sample_key}.. '
+                  f'only {name_key} will be found by get_sample, please check the file names')
+        self._sample_index()[sample_key] = name_key
+        
+    def __setitem__(self, name_key, value):
+        super().__setitem__(name_key, value)
+        self._index_sample(name_key)
+        
+    def __delitem__(self, name_key):
+        super().__delitem__(name_key)
+        self._sample_index().pop(parse_sample_key(name_key), None)
+        
+    def pop(self, name_key, *default):
+        if name_key in self:
+            self._sample_index().pop(parse_sample_key(name_key), None)
+        return super().pop(name_key, *default)
+    
+    def update(self, *args, **kwargs):
+        for name_key, value in dict(*args, **kwargs).items():
+            self[name_key] = value
             
-            # average of all cy3 calibrated control telo measurements (11 age matched controls)
-#             telos_individ_df_cy3Cal = telos_individ_df_cy3Cal.div(116.1848153)
+    def clear(self):
+        super().clear()
+        self._sample_index().clear()
+    
+    def get_sample_name(self, astro_id, timepoint):
+        # file name of the astronaut's sample at timepoint, or None
+        return self._sample_index().get((str(astro_id), timepoint))
+    
+    def get_sample(self, astro_id, timepoint, default=None):
+        name_key = self.get_sample_name(astro_id, timepoint)
+        return default if name_key is None else self[name_key]
+    
+    
+def extract_telomere_data_from_file(file_path, file_name, controls=False, template=None):
+    """
+    Single pass version of the extractors above: opens the telometer excel file once & returns 
+    {'individ telos': cleaned individual telomeres, 'telos per cell': per metaphase means}, both uncalibrated.
+    Returns None if the file can't be read.
+    """
+    
+    if template is None:
+        template = TELOMETER_TEMPLATE
+    
+    try:
+        # one streamed pass over both columns; the per cell rows (excel rows 4 on) sit inside the telomere rows
+        last_row = max(last_telomere_row_label(template) + 2, 4 + template['n_cells'])
+        sheet_values = read_telometer_columns(file_path, columns=[3, 12], first_row=2, last_row=last_row)
 
-            file_name_trimmed = file.name.replace('.xlsx', '')
-            dict_astro_individ_telos_dfs[file_name_trimmed] = telos_individ_df_cy3Cal
+    except:
+        return None
+    
+    individ_col_name = 'Individ Telos' if controls == False else 'Mean Individ Telos'
+    individual_telos_lengths = pd.Series(sheet_values[:, 0], name=individ_col_name)
+    telos_per_cell = per_cell_column_to_series(sheet_values[2:, 1])
+    
+    return {'individ telos': clean_individ_telos(individual_telos_lengths, template=template), 
+            'telos per cell': clean_telos_per_cell(telos_per_cell, template=template)}
 
-    print('Done collecting all astronaut telomere length excel files')
-    return dict_astro_individ_telos_dfs
 
+def generate_telomere_and_cell_dictionaries(patharg, controls=False, n_workers=None, cache_dir=None, template=None,
+                                            calibration_table=None, seed=0, sufficient_stats=None):
+    """
+    USAGE:
+    dict_individ_telos_dfs, dict_telos_per_cell_dfs, dict_cy3_calibrations = generate_telomere_and_cell_dictionaries(directory)
+    
+    Reads every telometer excel file in the directory once, returning the same individual telomere dictionary as
+    generate_dictionary_for_telomere_length_data (or grab_control_values_generate_dictionary if controls=True),
+    the same per cell dictionary as grab_astro_telo_values_per_cell_generate_dictionary (or the control version), 
+    & the Cy3 calibration applied per sample. Per cell means are also divided by CONTROL_MEAN_TELOMERE_LENGTH.
+    seed makes the control resampling reproducible (see resample_telomere_indices). A telomere_sufficient_stats 
+    passed as sufficient_stats is updated w/ the calibrated telomeres, before any resampling.
+    """
+    
+    if template is None:
+        template = TELOMETER_TEMPLATE
+    calibration_table = load_cy3_calibration_table(calibration_table)
+    
+    dict_telomere_data = collect_telomere_data_from_directory(patharg, extract_telomere_data_from_file, 
+                                                              n_workers=n_workers, cache_dir=cache_dir,
+                                                              extractor_kwargs={'controls': controls, 'template': template})
+    if isinstance(dict_telomere_data, int):
+        return dict_telomere_data
+    
+    dict_individ_telos_dfs = apply_cy3_calibration({file_name_trimmed: telomere_data['individ telos'] 
+                                                    for file_name_trimmed, telomere_data in dict_telomere_data.items()},
+                                                   calibration_table)
+    if sufficient_stats is not None:
+        sufficient_stats.update(dict_individ_telos_dfs)
+    dict_telos_per_cell_dfs = apply_cy3_calibration({file_name_trimmed: telomere_data['telos per cell'] 
+                                                     for file_name_trimmed, telomere_data in dict_telomere_data.items()},
+                                                    calibration_table, divide_by=CONTROL_MEAN_TELOMERE_LENGTH)
+    dict_cy3_calibrations = {file_name_trimmed: get_cy3_calibration(file_name_trimmed, calibration_table) 
+                             for file_name_trimmed in dict_telomere_data}
+    
+    if controls == True:
+        dict_individ_telos_dfs = resample_telomere_dict(dict_individ_telos_dfs, template['n_cells'], template['telos_per_cell'], 
+                                                        'rsamp', seed=seed)
+    
+    print('data collection complete')
+    return dict_individ_telos_dfs, dict_telos_per_cell_dfs, dict_cy3_calibrations
+
+
+# part of every cache tag; bump it when the extraction or cleaning code changes so entries written by the 
+# older code are no longer picked up
+TELOMERE_CACHE_VERSION = 1
+
+
+def telomere_cache_path(cache_dir, file_path, tag):
+    # one cache file per (excel file, extractor); hashing the absolute path keeps names short & unique
+    path_hash = hashlib.sha1(os.path.abspath(file_path).encode('utf-8')).hexdigest()[:16]
+    return os.path.join(cache_dir, f'{tag} {path_hash}.npz')
 
-def astronaut_histogram_stylizer_divyBins_byQuartile(fig, axs, n_bins, astroDF, astroquartile, astroname, axsNUMone, axsNUMtwo):
 
-        astroDF = astroDF.to_numpy()
-        astroquartile = astroquartile.to_numpy()
-        N, bins, patches = axs[axsNUMone,axsNUMtwo].hist(astroDF, bins=n_bins, range=(0, 400), edgecolor='black')
+def file_content_hash(file_path):
+    sha1 = hashlib.sha1()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            sha1.update(chunk)
+    return sha1.hexdigest()
 
-        for a in range(len(patches)):
-            if bins[a] <= np.quantile(astroquartile, 0.25):
-                patches[a].set_facecolor('#fdff38')
-            elif np.quantile(astroquartile, 0.25) < bins[a] and bins[a] <= np.quantile(astroquartile, 0.50):
-                patches[a].set_facecolor('#d0fefe')
-            elif np.quantile(astroquartile, 0.50) < bins[a] and bins[a] <= np.quantile(astroquartile, 0.75):
-                patches[a].set_facecolor('#d0fefe')
-            elif bins[a] > np.quantile(astroquartile, 0.75): 
-                patches[a].set_facecolor('#ffbacd')
 
-        axs[axsNUMone,axsNUMtwo].set_title(f"Histogram of {astroname}'s Telomeres")
-        axs[axsNUMone,axsNUMtwo].set_xlabel('Bins of Individ. Telomeres')
-        axs[axsNUMone,axsNUMtwo].set_ylabel('Freqs of Individ. Telomeres')
-        axs[axsNUMone,axsNUMtwo].xaxis.set_major_locator(plt.MaxNLocator(12))
+def telomere_data_to_arrays(data, prefix=''):
+    # flattens a single column dataframe, or a dict of dataframes/numbers, into named arrays for np.savez
+    if isinstance(data, pd.DataFrame):
+        return {f'{prefix}values': data.iloc[:, 0].to_numpy(dtype='float64'),
+                f'{prefix}index': data.index.to_numpy(dtype='int64'),
+                f'{prefix}column': str(data.columns[0])}
+    
+    arrays = {}
+    for key, item in data.items():
+        if isinstance(item, pd.DataFrame):
+            arrays.update(telomere_data_to_arrays(item, prefix=f'{prefix}{key}|'))
+        else:
+            arrays[f'{prefix}{key}'] = item
+    return arrays
+
+
+def arrays_to_telomere_data(arrays):
+    if 'values' in arrays:
+        return pd.DataFrame({str(arrays['column']): arrays['values']}, index=arrays['index'])
+    
+    data = {}
+    for key in arrays:
+        if '|' in key:
+            item_key = key.split('|')[0]
+            if item_key not in data:
+                data[item_key] = arrays_to_telomere_data({k.split('|', 1)[1]: v for k, v in arrays.items() 
+                                                          if k.startswith(f'{item_key}|')})
+        else:
+            data[key] = arrays[key].item()
+    return data
+
+
+def load_telomere_data_from_cache(cache_dir, file_path, tag):
+    """
+    Returns the cached data for file_path, or None if there's no cache entry or the excel file has changed. 
+    A matching size & mtime is taken as unchanged; otherwise the content hash is compared, so 
+    touching/copying a file without editing it doesn't force a re-parse. An unreadable cache file 
+    (i.e truncated by an interrupted save) is deleted & treated as a miss.
+    """
+    
+    cache_path = telomere_cache_path(cache_dir, file_path, tag)
+    if not os.path.exists(cache_path):
+        return None
+    
+    file_stat = os.stat(file_path)
+    try:
+        with np.load(cache_path, allow_pickle=False) as cached:
+            cached = dict(cached)
+        fingerprint = {key: cached.pop(key) for key in ['size', 'mtime', 'content_hash', 'file_path']}
+        data = arrays_to_telomere_data(cached)
+    except (zipfile.BadZipFile, ValueError, KeyError, OSError):
+        print(f'{cache_path} is unreadable, re-parsing {os.path.basename(file_path)}..')
+        os.remove(cache_path)
+        return None
         
+    if str(fingerprint['file_path']) != os.path.abspath(file_path):
+        return None
+    
+    if int(fingerprint['size']) != file_stat.st_size or int(fingerprint['mtime']) != file_stat.st_mtime_ns:
+        if str(fingerprint['content_hash']) != file_content_hash(file_path):
+            return None
         
-def astronaut_histogram_stylizer_divyBins_byQuartile_2Stacked(fig, axs, n_bins, astroDF, astroquartile, astroname, axsNUMone):
-
-    astroDF = astroDF.to_numpy()
-    astroquartile = astroquartile.to_numpy()
-    N, bins, patches = axs[axsNUMone].hist(astroDF, bins=n_bins, range=(0, 400), edgecolor='black')
+        # same contents, new timestamp.. refresh the fingerprint so the next lookup skips hashing
+        fingerprint.update(size=file_stat.st_size, mtime=file_stat.st_mtime_ns)
+        write_telomere_cache_file(cache_path, {**cached, **fingerprint})
+    
+    return data
 
-    for a in range(len(patches)):
-        if bins[a] <= np.quantile(astroquartile, 0.25):
-            patches[a].set_facecolor('#fdff38')
-        elif np.quantile(astroquartile, 0.25) < bins[a] and bins[a] <= np.quantile(astroquartile, 0.50):
-            patches[a].set_facecolor('#d0fefe')
-        elif np.quantile(astroquartile, 0.50) < bins[a] and bins[a] <= np.quantile(astroquartile, 0.75):
-            patches[a].set_facecolor('#d0fefe')
-        elif bins[a] > np.quantile(astroquartile, 0.75): 
-            patches[a].set_facecolor('#ffbacd')
 
-    axs[axsNUMone].set_title(f'Histogram of Individual Telomeres for {astroname}')
-    axs[axsNUMone].set_xlabel('Bins of Individ. Telomeres')
-    axs[axsNUMone].set_ylabel('Freqs of Individ. Telomeres')
-    axs[axsNUMone].xaxis.set_major_locator(plt.MaxNLocator(19))
+def save_telomere_data_to_cache(cache_dir, file_path, tag, data):
+    os.makedirs(cache_dir, exist_ok=True)
+    file_stat = os.stat(file_path)
+    
+    write_telomere_cache_file(telomere_cache_path(cache_dir, file_path, tag), 
+                              {'size': file_stat.st_size,
+                               'mtime': file_stat.st_mtime_ns,
+                               'content_hash': file_content_hash(file_path),
+                               'file_path': os.path.abspath(file_path),
+                               **telomere_data_to_arrays(data)})
     
     
+def write_telomere_cache_file(cache_path, arrays):
+    # written next to the cache file & renamed over it, so an interrupted save never leaves a partial entry
+    temp_path = f'{cache_path}.tmp'
+    with open(temp_path, 'wb') as f:
+        np.savez(f, **arrays)
+    os.replace(temp_path, cache_path)
+
+
 def gen_missing_values_andimpute_or_randomsampledown(n_cells, telosPercell, astro_df, option=None):
 
     if astro_df.size > 5520:
@@ -235,6 +670,76 @@ def gen_missing_values_andimpute_or_randomsampledown(n_cells, telosPercell, astr
         return astro_df
     
     
+def resample_telomere_indices(lengths, sample_keys, n_cells=30, telos_per_cell=184, option='rsamp', seed=0, shuffle=False):
+    """
+    Batched, reproducible version of gen_missing_values_andimpute_or_randomsampledown: normalizes every sample 
+    to n_cells * telos_per_cell telomeres (T) & returns, per sample, the positions of its telomeres to keep.
+    For a sample of N telomeres:
+        N > T:               T of them, drawn w/o replacement
+        25 < N <= T / 2:     all of them + T - N drawn w/ replacement
+        T / 2 < N < T:       all of them + T - N drawn w/o replacement (option='rsamp'), otherwise as is
+        otherwise:           as is
+    Each sample draws from its own np.random.Generator seeded by (seed, crc32 of its key), so a sample's 
+    draws don't depend on which other samples are normalized alongside it. shuffle=True permutes each 
+    sample's positions; order doesn't matter for the histograms/statistics, so by default the drawn 
+    positions come first followed by the original ones.
+    """
+    
+    target = n_cells * telos_per_cell
+    sample_indices = []
+    
+    for n_telos, sample_key in zip(lengths, sample_keys):
+        rng = np.random.default_rng([seed, zlib.crc32(str(sample_key).encode('utf-8'))])
+        
+        if n_telos > target:
+            indices = rng.choice(n_telos, target, replace=False)
+        elif 25 < n_telos <= target / 2:
+            indices = np.concatenate([rng.integers(0, n_telos, target - n_telos), np.arange(n_telos)])
+        elif 25 < n_telos < target and option == 'rsamp':
+            indices = np.concatenate([rng.choice(n_telos, target - n_telos, replace=False), np.arange(n_telos)])
+        else:
+            indices = np.arange(n_telos)
+            
+        if shuffle:
+            rng.shuffle(indices)
+        sample_indices.append(indices)
+        
+    return sample_indices
+
+
+def resample_telomere_store(store, sample_keys=None, n_cells=30, telos_per_cell=184, option='rsamp', seed=0, 
+                            shuffle=False, return_indices=False):
+    """
+    Normalizes every sample of a ragged_telomere_store in one call (see resample_telomere_indices). sample_keys 
+    default to 'astro id timepoint' from the store's index. Returns a new store gathered from store.values, or 
+    w/ return_indices=True just (positions into store.values, offsets of the resampled samples).
+    """
+    
+    if sample_keys is None:
+        sample_keys = [' '.join(str(value) for value in row) for row in store.index[['astro id', 'timepoint']].to_numpy()]
+    
+    sample_indices = resample_telomere_indices(store.lengths, sample_keys, n_cells=n_cells, telos_per_cell=telos_per_cell,
+                                               option=option, seed=seed, shuffle=shuffle)
+    
+    offsets = np.zeros(len(sample_indices) + 1, dtype='int64')
+    offsets[1:] = np.cumsum([len(indices) for indices in sample_indices])
+    flat_indices = (np.concatenate([store.offsets[i] + indices for i, indices in enumerate(sample_indices)]) 
+                    if sample_indices else np.empty(0, dtype='int64'))
+    
+    if return_indices:
+        return flat_indices, offsets
+    return ragged_telomere_store(store.values[flat_indices], offsets, store.index)
+
+
+def resample_telomere_dict(dict_telos_dfs, n_cells=30, telos_per_cell=184, option='rsamp', seed=0):
+    # resample_telomere_indices over {file name: single column dataframe}, keyed by file name
+    sample_indices = resample_telomere_indices([len(telos_df) for telos_df in dict_telos_dfs.values()], 
+                                               list(dict_telos_dfs.keys()), n_cells=n_cells, 
+                                               telos_per_cell=telos_per_cell, option=option, seed=seed)
+    return telomere_sample_dict((name_key, telos_df.iloc[indices].reset_index(drop=True)) 
+                                for (name_key, telos_df), indices in zip(dict_telos_dfs.items(), sample_indices))
+    
+    
 def statistics_between_timepoints(astro_pre, astro_mid1, astro_mid2, astro_post, 
     astro_prename, astro_mid1name, astro_mid2name, astro_postname, test):
 
@@ -365,39 +870,149 @@ def get_timepoint(name_key):
         
         
 def make_quartiles_columns(astro_df):
+    """
+    Fills the Q1 / Q2-3 / Q4 columns w/ the number of telomeres in each sample at or below the 25th percentile, 
+    between the 25th & 75th, & at or above the 75th percentile of that astronaut's pre-flight baseline 
+    (L-270, or L-180 if the astronaut has no L-270). Cutoffs are computed once per astronaut & every sample 
+    is counted in one pass over the concatenated telomeres (see quantile_band_counts for other cutoffs).
     
-    pos_1, pos_2, pos_3 = 6, 7, 8
-    astro_id, timepoint, flight, telo_data = 1, 2, 3, 4
+    astro_df can also be a ragged_telomere_store (i.e from open_telomere_memmap): the counts are then returned 
+    on a copy of the store's index, NaN for samples w/o a baseline.
+    """
+    
+    all_telos, lengths, index = concatenated_telos_and_index(astro_df)
+    
+    known_flight = np.isin(index['flight status'].to_numpy(), ['Pre-Flight', 'Mid-Flight', 'Post-Flight'])
+    if not known_flight.all():
+        print('unknown label in row[1] of the all patients df.. please check patient timepoint names')
+    
+    cutoffs = baseline_quantile_cutoffs(astro_df, [0.25, 0.75])
+    counts = count_telos_in_bands(all_telos, lengths, cutoffs)
+    
+    if isinstance(astro_df, ragged_telomere_store):
+        astro_df = index.copy()
+        for col in ['Q1', 'Q2-3', 'Q4']:
+            astro_df[col] = np.nan
+    
+    # every counted sample's Q1 / Q2-3 / Q4 in one assignment, samples w/o a baseline keep their labels
+    rows = np.flatnonzero(known_flight & ~np.isnan(cutoffs).any(axis=1))
+    astro_df.iloc[rows, [astro_df.columns.get_loc(col) for col in ['Q1', 'Q2-3', 'Q4']]] = counts[rows]
+    
+    return astro_df
 
-    for i, row in astro_df.iterrows():
-        
-        astro_id_4digit = row[astro_id]
-        
-        if row[flight] == 'Pre-Flight' and row[timepoint] == 'L-270':
-            preFlight_telos = row[telo_data]
-            astro_df.iat[i, pos_1], astro_df.iat[i, pos_2], astro_df.iat[i, pos_3] = (quartile_cts_rel_to_df1(preFlight_telos, preFlight_telos))
-            
-        elif row[flight] == 'Pre-Flight' and row[timepoint] == 'L-180':
-            if 'L-270' in list(astro_df[astro_df['astro id'] == astro_id_4digit]['timepoint']):
-                astro_df.iat[i, pos_1], astro_df.iat[i, pos_2], astro_df.iat[i, pos_3] = (quartile_cts_rel_to_df1(preFlight_telos, row[telo_data]))
-                
-            elif 'L-270' not in list(astro_df[astro_df['astro id'] == astro_id_4digit]['timepoint']):
-                preFlight_telos = row[telo_data]
-                astro_df.iat[i, pos_1], astro_df.iat[i, pos_2], astro_df.iat[i, pos_3] = (quartile_cts_rel_to_df1(preFlight_telos, preFlight_telos))
-            
-        elif row[flight] == 'Pre-Flight':
-            astro_df.iat[i, pos_1], astro_df.iat[i, pos_2], astro_df.iat[i, pos_3] = (quartile_cts_rel_to_df1(preFlight_telos, row[telo_data]))
 
-        elif row[flight] == 'Mid-Flight':
-            astro_df.iat[i, pos_1], astro_df.iat[i, pos_2], astro_df.iat[i, pos_3] = (quartile_cts_rel_to_df1(preFlight_telos, row[telo_data]))
+def concatenated_telos_and_index(data, telo_col='telo data'):
+    # (all telomeres as one float64 array, length per sample, astro id / timepoint / flight status per sample) 
+    # from a make_astronaut_dataframe dataframe or a ragged_telomere_store
+    if isinstance(data, ragged_telomere_store):
+        return np.asarray(data.values, dtype='float64'), data.lengths, data.index
+    
+    telo_arrays = [np.asarray(telos, dtype='float64').reshape(-1,) for telos in data[telo_col]]
+    lengths = np.array([len(telos) for telos in telo_arrays], dtype='int64')
+    all_telos = np.concatenate(telo_arrays) if telo_arrays else np.empty(0)
+    return all_telos, lengths, data[['astro id', 'timepoint', 'flight status']].reset_index(drop=True)
 
-        elif row[flight] == 'Post-Flight':
-            astro_df.iat[i, pos_1], astro_df.iat[i, pos_2], astro_df.iat[i, pos_3] = (quartile_cts_rel_to_df1(preFlight_telos, row[telo_data]))
 
-        else:
-            print('unknown label in row[1] of the all patients df.. please check patient timepoint names')
+def baseline_quantile_cutoffs(data, quantiles, telo_col='telo data'):
+    """
+    Returns an (n samples, n quantiles) array of each sample's cutoffs: the quantiles of its astronaut's 
+    pre-flight baseline, L-270 or L-180 if there's no L-270. Rows of astronauts w/o either baseline are NaN, 
+    & reported. data is a make_astronaut_dataframe dataframe or a ragged_telomere_store.
+    """
     
-    return astro_df
+    if isinstance(data, ragged_telomere_store):
+        index, telos_of = data.index, lambda i: data[i]
+    else:
+        index, telos_of = data, lambda i: data[telo_col].iat[i]
+    
+    astro_ids = index['astro id'].to_numpy()
+    timepoints = index['timepoint'].astype(str).to_numpy()
+    pre_flight = index['flight status'].to_numpy() == 'Pre-Flight'
+    
+    # L-270 is looked at last so it wins over L-180
+    baseline_cutoffs = {}
+    for baseline in ['L-180', 'L-270']:
+        for i in np.flatnonzero(pre_flight & (timepoints == baseline)):
+            baseline_cutoffs[astro_ids[i]] = np.nanquantile(np.asarray(telos_of(i), dtype='float64'), quantiles)
+    
+    missing = sorted(set(astro_id for astro_id in astro_ids if astro_id not in baseline_cutoffs))
+    if missing:
+        print(f'no L-270 or L-180 baseline for astro id(s) {missing}')
+    
+    no_baseline = np.full(len(quantiles), np.nan)
+    return np.array([baseline_cutoffs.get(astro_id, no_baseline) for astro_id in astro_ids]).reshape(-1, len(quantiles))
+
+
+def count_telos_in_bands(all_telos, lengths, cutoffs):
+    """
+    Counts each sample's telomeres in the len(cutoffs) + 1 bands between its (ascending) cutoffs, in one pass 
+    over the concatenated telomeres. A telomere on a cutoff counts in the band below it, except on the top 
+    cutoff, which counts in the top band; w/ the 25th & 75th percentiles that's Q1 <=, Q2-3 between, Q4 >=.
+    Returns an (n samples, n bands) int array; missing telomere values aren't counted.
+    """
+    
+    cutoffs = np.asarray(cutoffs, dtype='float64')
+    n_samples, n_cutoffs = cutoffs.shape
+    sample_ids = np.repeat(np.arange(n_samples), lengths)
+    band = telo_bands(all_telos, lengths, cutoffs)
+    
+    measured = ~np.isnan(all_telos)
+    counts = np.bincount(sample_ids[measured] * (n_cutoffs + 1) + band[measured], minlength=n_samples * (n_cutoffs + 1))
+    return counts.reshape(n_samples, n_cutoffs + 1)
+
+
+def telo_bands(all_telos, lengths, cutoffs):
+    # band of each telomere between its sample's cutoffs, same edge rules as count_telos_in_bands
+    cutoffs = np.asarray(cutoffs, dtype='float64')
+    n_cutoffs = cutoffs.shape[1]
+    
+    band = np.zeros(len(all_telos), dtype='int64')
+    for j in range(n_cutoffs):
+        cutoff = np.repeat(cutoffs[:, j], lengths)
+        band += (all_telos >= cutoff) if j == n_cutoffs - 1 else (all_telos > cutoff)
+    return band
+
+
+def quantile_band_counts(data, quantiles=None, thresholds=None, telo_col='telo data'):
+    """
+    USAGE:
+    decile_counts = quantile_band_counts(astro_df, quantiles=np.arange(0.1, 1, 0.1))
+    short_telo_counts = quantile_band_counts(store, thresholds=[0.5, 1.5])
+    
+    Tidy table of telomere counts per sample & band: bands between the quantiles of the sample's 
+    astronaut's pre-flight baseline (see baseline_quantile_cutoffs), or between absolute thresholds in 
+    telomere length units. Defaults to quantiles=[0.25, 0.75], the Q1 / Q2-3 / Q4 bands of make_quartiles_columns. 
+    data is a make_astronaut_dataframe dataframe or a ragged_telomere_store. Samples w/o a baseline are left out.
+    Columns: astro id, timepoint, flight status, band, lower cutoff, upper cutoff, count, fraction.
+    """
+    
+    all_telos, lengths, index = concatenated_telos_and_index(data, telo_col=telo_col)
+    
+    if thresholds is not None:
+        edges = sorted(thresholds)
+        cutoffs = np.tile(np.asarray(edges, dtype='float64'), (len(lengths), 1))
+        edge_names = ['min'] + [f'{edge:g}' for edge in edges] + ['max']
+    else:
+        edges = sorted([0.25, 0.75] if quantiles is None else quantiles)
+        cutoffs = baseline_quantile_cutoffs(data, edges, telo_col=telo_col)
+        edge_names = ['q0'] + [f'q{edge:g}' for edge in edges] + ['q1']
+    
+    counts = count_telos_in_bands(all_telos, lengths, cutoffs)
+    n_bands = counts.shape[1]
+    
+    band_counts_df = index.iloc[np.repeat(np.arange(len(index)), n_bands)].reset_index(drop=True)
+    band_counts_df['band'] = np.tile([f'{edge_names[b]}-{edge_names[b + 1]}' for b in range(n_bands)], len(index))
+    
+    padded_cutoffs = np.hstack([np.full((len(index), 1), -np.inf), cutoffs, np.full((len(index), 1), np.inf)])
+    band_counts_df['lower cutoff'] = padded_cutoffs[:, :-1].reshape(-1,)
+    band_counts_df['upper cutoff'] = padded_cutoffs[:, 1:].reshape(-1,)
+    band_counts_df['count'] = counts.reshape(-1,)
+    
+    with np.errstate(invalid='ignore', divide='ignore'):
+        band_counts_df['fraction'] = counts.reshape(-1,) / np.repeat(counts.sum(axis=1), n_bands)
+    
+    has_cutoffs = np.repeat(~np.isnan(cutoffs).any(axis=1), n_bands)
+    return band_counts_df[has_cutoffs].reset_index(drop=True)
 
 
 
@@ -406,8 +1021,9 @@ def graphing_statistics_telomere_data(dict_astro_individ_telos_dfs):
     astro_list_of_IDs = ['5163', '2171', '1536', '7673', '4819', '3228', 
                          '2494', '2479', '2381', '1261', '1062']
     
-    timepoint_series = ['L-270', 'L-180', 'L-60', 'FD45', 'FD90', 'FD140', 
-                       'FD260', 'R+5', 'R+7', 'R+60', 'R+180', 'R+270']
+    # samples are looked up by (astro id, timepoint) rather than by scanning the file names
+    if not isinstance(dict_astro_individ_telos_dfs, telomere_sample_dict):
+        dict_astro_individ_telos_dfs = telomere_sample_dict(dict_astro_individ_telos_dfs)
 
     n=0
     
@@ -417,70 +1033,23 @@ def graphing_statistics_telomere_data(dict_astro_individ_telos_dfs):
     #   #initialize blank list of timepoints
         data = [[1, 0, 0, 0], [0]]
         
-        emptydata = pd.DataFrame(data)
-        astro_L270 = pd.DataFrame(data)
-        astro_L180 = pd.DataFrame(data)
-        astro_L60 = pd.DataFrame(data)
-        astro_Mid1 = pd.DataFrame(data)
-        astro_Mid2 = pd.DataFrame(data)
-        astro_R7 = pd.DataFrame(data)
-        astro_R60 = pd.DataFrame(data)
-        astro_R180 = pd.DataFrame(data)
-        astro_R270 = pd.DataFrame(data)
-        
-
-        astro_L270name = ''
-        astro_L180name = ''
-        astro_L60name = ''
-        astro_Mid1name = ''
-        astro_Mid2name = ''
-        astro_R7name = ''
-        astro_R60name = ''
-        astro_R180name = ''
-        astro_R270name = ''
-
-        for j in timepoint_series:
-            for i in dict_astro_individ_telos_dfs.keys():
-                
-                
-                if (idNO in i) and j == 'L-270' and ('L-270' in i):
-                    astro_L270 = dict_astro_individ_telos_dfs[i]
-                    astro_L270name = i.replace('mphase TeloFISH', '').replace('.xlsx', '')
-
-                elif (idNO in i) and j == 'L-180' and ('L-180' in i):
-                    astro_L180 = dict_astro_individ_telos_dfs[i]
-                    astro_L180name = i.replace('mphase TeloFISH', '').replace('.xlsx', '')
-
-                elif (idNO in i) and j == 'L-60' and ('L-60' in i):
-                    astro_L60 = dict_astro_individ_telos_dfs[i]
-                    astro_L60name = i.replace('mphase TeloFISH', '').replace('.xlsx', '')
-    
-                elif (idNO in i) and (j == 'FD45' or j == 'FD90') and (j in i):
-                    astro_Mid1 = dict_astro_individ_telos_dfs[i]                 
-                    astro_Mid1name = i.replace('mphase TeloFISH', '').replace('.xlsx', '')
-                    
-                elif (idNO in i) and (j == 'FD140' or j == 'FD260') and (j in i):
-                    astro_Mid2 = dict_astro_individ_telos_dfs[i]
-                    astro_Mid2name = i.replace('mphase TeloFISH', '').replace('.xlsx', '')
-
-                elif (idNO in i) and j == 'R+7' and (j in i):
-                    astro_R7 = dict_astro_individ_telos_dfs[i]               
-                    astro_R7name = i.replace('mphase TeloFISH', '').replace('.xlsx', '')
-
-                elif (idNO in i) and j == 'R+60' and (j in i):
-                    astro_R60 = dict_astro_individ_telos_dfs[i]                      
-                    astro_R60name = i.replace('mphase TeloFISH', '').replace('.xlsx', '')
-
-                elif (idNO in i) and j == 'R+180' and (j in i):
-                    astro_R180 = dict_astro_individ_telos_dfs[i]                 
-                    astro_R180name = i.replace('mphase TeloFISH', '').replace('.xlsx', '')
-
-                elif (idNO in i) and j == 'R+270' and (j in i):
-                    astro_R270 = dict_astro_individ_telos_dfs[i]           
-                    astro_R270name = i.replace('mphase TeloFISH', '').replace('.xlsx', '')
-                    
-                else:
-                    continue
+        def fetch_sample(timepoints):
+            # first of timepoints the astronaut has a sample for, w/ its display name; blank if none
+            for timepoint in timepoints:
+                name_key = dict_astro_individ_telos_dfs.get_sample_name(idNO, timepoint)
+                if name_key is not None:
+                    return dict_astro_individ_telos_dfs[name_key], name_key.replace('mphase TeloFISH', '').replace('.xlsx', '')
+            return pd.DataFrame(data), ''
+        
+        astro_L270, astro_L270name = fetch_sample(['L-270'])
+        astro_L180, astro_L180name = fetch_sample(['L-180'])
+        astro_L60, astro_L60name = fetch_sample(['L-60'])
+        astro_Mid1, astro_Mid1name = fetch_sample(['FD90', 'FD45'])
+        astro_Mid2, astro_Mid2name = fetch_sample(['FD260', 'FD140'])
+        astro_R7, astro_R7name = fetch_sample(['R+7'])
+        astro_R60, astro_R60name = fetch_sample(['R+60'])
+        astro_R180, astro_R180name = fetch_sample(['R+180'])
+        astro_R270, astro_R270name = fetch_sample(['R+270'])
 
         if idNO == '5163' or idNO == '2171' or idNO == '1536':
             if (astro_L270.size > 25 or astro_L180.size > 25) and (astro_Mid1.size > 25 and astro_Mid2.size > 25 ) and (astro_R180.size > 25 or astro_R270.size > 25):
@@ -572,273 +1141,772 @@ def graphing_statistics_telomere_data(dict_astro_individ_telos_dfs):
         
         
         
-def grab_control_values_generate_dictionary(patharg):
-
-    dict_mean_individ_telos_dfs = {}
-
-    for file in os.scandir(patharg):
-        if file.name.endswith('.xlsx') and file.name.startswith('~$') == False:
-            print(file.name, 'telomere data acquisition in progress..')
-        
-            try:
-                df = pd.read_excel(file)
-
-            except:
-                print('File not found..')
-                return -1
-
-            df.rename(columns={'Unnamed: 3':'Mean Individ Telos'}, inplace=True)
-
-            mean_values_of_individual_telomere_lengths = (df['Mean Individ Telos'])
-            mean_values_of_individual_telomere_lengths = mean_values_of_individual_telomere_lengths.drop(labels=[5, 192, 379, 566, 753, 940, 1127, 1314,
-                    1501, 1688, 1875, 2062, 2249, 2436, 2623, 2810, 2997, 3184, 3371, 3558, 3745, 3932, 4119, 4306, 4493, 4680, 4867, 5054, 5241, 5428])
-            mean_values_of_individual_telomere_lengths = mean_values_of_individual_telomere_lengths.iloc[7:5611]
-            meantelos_str_toNaN = pd.to_numeric(mean_values_of_individual_telomere_lengths, errors='coerce')
-            mean_individual_telos_cleaned = meantelos_str_toNaN.dropna(axis=0, how='any')
-            mean_individ_df = mean_individual_telos_cleaned.to_frame(name=None)
-            mean_individ_df = mean_individ_df[(np.abs(stats.zscore(mean_individ_df)) < 3).all(axis=1)]
-
-            if '0397' in file.name:
-                mean_individ_df_cy3Cal = mean_individ_df.div(2.285)
-
-            elif '3907' in file.name:
-                mean_individ_df_cy3Cal = mean_individ_df.div(2.179)
-
-            elif '1826' in file.name:
-                mean_individ_df_cy3Cal = mean_individ_df.div(2.143)
-
-            elif '0100' in file.name:
-                mean_individ_df_cy3Cal = mean_individ_df.div(59.86)
-
-            elif '0912' in file.name:
-                mean_individ_df_cy3Cal = mean_individ_df.div(80.5)
-
-            elif '0646' in file.name:
-                mean_individ_df_cy3Cal = mean_individ_df.div(80.5)
-
-            else:
-                mean_individ_df_cy3Cal = mean_individ_df
+def grab_control_values_generate_dictionary(patharg, n_workers=None, cache_dir=None, template=None, 
+                                            calibration_table=None, seed=0):
+    
+    if template is None:
+        template = TELOMETER_TEMPLATE
 
-            file_name_trimmed = file.name.replace('.xlsx', '')
-            
-            
-            mean_individ_df_cy3Cal = gen_missing_values_andimpute_or_randomsampledown(30, 184, mean_individ_df_cy3Cal, 'rsamp')
-            
-            dict_mean_individ_telos_dfs[file_name_trimmed] = mean_individ_df_cy3Cal
+    dict_mean_individ_telos_dfs = collect_telomere_data_from_directory(patharg, extract_individ_telos_from_file,
+                                                                       n_workers=n_workers, cache_dir=cache_dir,
+                                                                       extractor_kwargs={'template': template, 
+                                                                                         'name': 'Mean Individ Telos'})
+    if isinstance(dict_mean_individ_telos_dfs, int):
+        return dict_mean_individ_telos_dfs
+    
+    dict_mean_individ_telos_dfs = apply_cy3_calibration(dict_mean_individ_telos_dfs, calibration_table)
+    
+    # resampling happens after the cache so the cached values stay the cleaned telomeres
+    dict_mean_individ_telos_dfs = resample_telomere_dict(dict_mean_individ_telos_dfs, template['n_cells'], 
+                                                         template['telos_per_cell'], 'rsamp', seed=seed)
 
     print('data collection complete')
     return dict_mean_individ_telos_dfs
 
 
-def grab_control_telo_values_per_cell_generate_dictionary(patharg):
-
-    dict_mean_individ_telos_dfs = {}
+def grab_control_telo_values_per_cell_generate_dictionary(patharg, n_workers=None, cache_dir=None, template=None,
+                                                          calibration_table=None):
 
-    for file in os.scandir(patharg):
-        if file.name.endswith('.xlsx') and file.name.startswith('~$') == False:
-            print(file.name, 'telomere data acquisition in progress..')
-        
-            try:
-                df = pd.read_excel(file, skiprows=3)
-                df = df.iloc[0:30, 12].to_frame()
+    dict_mean_individ_telos_dfs = collect_telomere_data_from_directory(patharg, extract_telo_values_per_cell_from_file,
+                                                                       n_workers=n_workers, cache_dir=cache_dir,
+                                                                       extractor_kwargs={'template': template})
+    if isinstance(dict_mean_individ_telos_dfs, int):
+        return dict_mean_individ_telos_dfs
+    
+    dict_mean_individ_telos_dfs = apply_cy3_calibration(dict_mean_individ_telos_dfs, calibration_table, 
+                                                        divide_by=CONTROL_MEAN_TELOMERE_LENGTH)
 
-            except:
-                print('File not found..')
-                return -1
+    print('data collection complete')
+    return dict_mean_individ_telos_dfs
 
-            mean_individ_df = df.dropna(axis=0, how='any')
 
-            if '0397' in file.name:
-                mean_individ_df_cy3Cal = mean_individ_df.div(2.285)
+def grab_astro_telo_values_per_cell_generate_dictionary(patharg, n_workers=None, cache_dir=None, template=None,
+                                                        calibration_table=None):
 
-            elif '3907' in file.name:
-                mean_individ_df_cy3Cal = mean_individ_df.div(2.179)
+    dict_astro_individ_telos_dfs = collect_telomere_data_from_directory(patharg, extract_telo_values_per_cell_from_file,
+                                                                        n_workers=n_workers, cache_dir=cache_dir,
+                                                                        extractor_kwargs={'template': template})
+    if isinstance(dict_astro_individ_telos_dfs, int):
+        return dict_astro_individ_telos_dfs
+    
+    dict_astro_individ_telos_dfs = apply_cy3_calibration(dict_astro_individ_telos_dfs, calibration_table, 
+                                                         divide_by=CONTROL_MEAN_TELOMERE_LENGTH)
 
-            elif '1826' in file.name:
-                mean_individ_df_cy3Cal = mean_individ_df.div(2.143)
+    print('Done collecting all astronaut telomere length excel files')
+    return dict_astro_individ_telos_dfs
 
-            elif '0100' in file.name:
-                mean_individ_df_cy3Cal = mean_individ_df.div(59.86)
 
-            elif '0912' in file.name:
-                mean_individ_df_cy3Cal = mean_individ_df.div(80.5)
+def extract_telo_values_per_cell_from_file(file_path, file_name, template=None):
+    # mean telomere length per metaphase, cleaned & uncalibrated; same for astronauts & controls
+        
+    try:
+        telos_per_cell = read_telos_per_cell_column(file_path, template=template)
 
-            elif '0646' in file.name:
-                mean_individ_df_cy3Cal = mean_individ_df.div(80.5)
+    except:
+        return None
 
-            else:
-                mean_individ_df_cy3Cal = mean_individ_df
+    return clean_telos_per_cell(telos_per_cell, template=template)
 
-            file_name_trimmed = file.name.replace('.xlsx', '')
-            
-            mean_individ_df_cy3Cal = mean_individ_df_cy3Cal.div(116.1848153)
-            dict_mean_individ_telos_dfs[file_name_trimmed] = mean_individ_df_cy3Cal
 
-    print('data collection complete')
-    return dict_mean_individ_telos_dfs
+def raincloud_plot_astros_groups(x=None, y=None, data=None, 
+                                 groupby=None, iterable=None):
+    
+    group_df = data.groupby(groupby)
+    
+    for item in iterable:
+        plot_df = group_df.get_group(item)
+        if x == 'timepoint':
+        #this line only needed for timepoint
+            plot_df[x].cat.remove_unused_categories(inplace=True)
+    
+        ax = sns.set(font_scale=1)
+        #bw = sigma
+        ax = pt.RainCloud(x = x, y = y, data = plot_df, palette = "Set2", bw = .20, 
+                     width_viol = .8, figsize = (8,6), move=0.21, orient = "h")
+        plt.title(f'{item} telos', fontsize=16)        
+    
+        
+TIMEPOINT_ORDER = ['L-270', 'L-180', 'L-60', 'FD45', 'FD90', 'FD140', 'FD260', 'R+5', 'R+7', 'R+60', 'R+105', 'R+180', 'R+270']
 
 
-def grab_astro_telo_values_per_cell_generate_dictionary(patharg):
+def telomere_sample_index(name_keys):
+    # astro id / timepoint / flight status per sample, parsed from the file names as make_*_dataframe does
+    index = pd.DataFrame([[name_key[3:7], get_timepoint(name_key), relative_flight_timepoint(name_key)] 
+                          for name_key in name_keys], 
+                         columns=['astro id', 'timepoint', 'flight status'])
+    index['timepoint'] = pd.Categorical(index['timepoint'], categories=TIMEPOINT_ORDER)
+    return index
 
-    dict_astro_individ_telos_dfs = {}
 
-    for file in os.scandir(patharg):
-        if file.name.endswith('.xlsx') and file.name.startswith('~$') == False:
-            print(f'{file.name} telomere data acquisition in progress..')
+def bootstrap_telomere_cis(data, n_boot=2000, ci=0.95, quantiles=[0.25, 0.75], cell_data=None, seed=0, 
+                           chunk_size=None, n_workers=None, telo_col='telo data', raw_telos=None):
+    """
+    USAGE:
+    astro_df_cis = bootstrap_telomere_cis(astro_df, raw_telos=dict_astro_individ_telos_dfs, n_boot=5000, n_workers=8)
+    astro_df_cis = bootstrap_telomere_cis(astro_df, raw_telos=dict_astro_individ_telos_dfs, cell_data=astro_cell_df)
+    sample_cis = bootstrap_telomere_cis(dict_astro_individ_telos_dfs)
+    
+    Percentile bootstrap confidence intervals (ci) per sample for the mean & median telomere length & the 
+    fraction of telomeres in each band between the astronaut's pre-flight baseline quantiles (Q1 / Q2-3 / Q4 
+    by default, see baseline_quantile_cutoffs). Replicates are drawn as (replicates, telomeres) index matrices 
+    in chunks of chunk_size replicates (by default ~4M indices per chunk) & the statistics are reduced over 
+    the whole chunk at once. Each sample draws from its own np.random.Generator seeded by (seed, crc32 of 
+    'astro id timepoint'), so results don't depend on n_workers; w/ n_workers > 1 samples run in a process pool.
+    
+    If cell_data (make_astronaut_cell_data_dataframe dataframe or its store) is given, the mean is bootstrapped 
+    over each sample's per cell means instead, which keeps the between cell variation in the interval (cell means 
+    are rescaled to the sample's mean telomere length first), & the median of those cell means is added as 
+    'cell means median'; 'telo median' & the band fractions are always bootstrapped over telomeres.
+    
+    The bootstrap should draw from each sample's measured telomeres: make_astronaut_dataframe's 'telo data' is 
+    already resampled (or upsampled) to 30 cells * 184 telomeres, & resampling those duplicated values again 
+    gives intervals that are too narrow. So data is the ingest dictionary ({file name: telomeres}, i.e from 
+    generate_dictionary_for_telomere_length_data), a ragged_telomere_store of the measured telomeres 
+    (ragged_telomere_store.from_dict / open_telomere_memmap), or a make_astronaut_dataframe dataframe w/ 
+    raw_telos, the ingest dictionary its samples are drawn from. Without raw_telos a dataframe's (or 
+    make_astronaut_dataframe's store's) resampled telomeres are bootstrapped as given, so the intervals are 
+    conditional on that resampling; a note is printed for dataframes.
+    
+    Returns a copy of the dataframe (or the store's index) w/ '{statistic}', '{statistic} ci lower' & 
+    '{statistic} ci upper' columns for 'telo means', 'telo median', '{band} fraction' (& 'cell means median'); 
+    an existing 'telo means' column is kept as is.
+    """
+    
+    if isinstance(data, dict):
+        data = ragged_telomere_store.from_dict(data, dtype='float64')
+    df = data.copy() if isinstance(data, pd.DataFrame) else data.index.copy()
+    
+    if raw_telos is not None:
+        data = raw_telomere_store(data, raw_telos)
+    elif isinstance(data, pd.DataFrame):
+        print(f"bootstrapping the resampled '{telo_col}', the intervals are conditional on the resampling.. "
+              f"pass raw_telos to bootstrap the measured telomeres")
+    
+    all_telos, lengths, index = concatenated_telos_and_index(data, telo_col=telo_col)
+    offsets = np.concatenate([[0], np.cumsum(lengths)])
+    
+    edges = sorted(quantiles)
+    cutoffs = baseline_quantile_cutoffs(data, edges, telo_col=telo_col)
+    bands = telo_bands(all_telos, lengths, cutoffs)
+    has_cutoffs = ~np.isnan(cutoffs).any(axis=1)
+    
+    if edges == [0.25, 0.75]:
+        band_names = ['Q1', 'Q2-3', 'Q4']
+    else:
+        edge_names = ['q0'] + [f'q{edge:g}' for edge in edges] + ['q1']
+        band_names = [f'{edge_names[b]}-{edge_names[b + 1]}' for b in range(len(edges) + 1)]
+    
+    sample_keys = [f'{astro_id} {timepoint}' for astro_id, timepoint in zip(index['astro id'], index['timepoint'])]
+    
+    cell_means = [None] * len(index)
+    if cell_data is not None:
+        cell_telos, cell_lengths, cell_index = concatenated_telos_and_index(cell_data, telo_col='telo data per cell')
+        cell_offsets = np.concatenate([[0], np.cumsum(cell_lengths)])
+        cells_of = {f'{astro_id} {timepoint}': cell_telos[cell_offsets[i]:cell_offsets[i + 1]] 
+                    for i, (astro_id, timepoint) in enumerate(zip(cell_index['astro id'], cell_index['timepoint']))}
+        cell_means = [cells_of.get(sample_key) for sample_key in sample_keys]
         
-            try:
-                df = pd.read_excel(file, skiprows=3)
-                df = df.iloc[0:30, 12].to_frame()
-
-            except:
-                print(f'{file.name} File not found..')
-                return -1
-            
-            telos_individ_df = df.dropna(axis=0, how='any')
-            
-            if ('5163' in file.name) or ('1536' in file.name):
-                telos_individ_df_cy3Cal = telos_individ_df.div(59.86)
+        missing = [sample_key for sample_key, cells in zip(sample_keys, cell_means) if cells is None]
+        if missing:
+            print(f'no per cell data for {missing}, bootstrapping their telomeres instead')
+    
+    telo_list = [all_telos[offsets[i]:offsets[i + 1]] for i in range(len(index))]
+    band_list = [bands[offsets[i]:offsets[i + 1]] if has_cutoffs[i] else None for i in range(len(index))]
+    
+    bootstrapper = partial(bootstrap_sample_statistics, n_bands=len(band_names), n_boot=n_boot, ci=ci, 
+                           seed=seed, chunk_size=chunk_size, cell_median=cell_data is not None)
+    
+    if n_workers is not None and n_workers > 1:
+        print(f'bootstrapping {len(index)} samples w/ {n_workers} processes..')
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            results = list(executor.map(bootstrapper, telo_list, band_list, cell_means, sample_keys))
+    else:
+        results = [bootstrapper(*args) for args in zip(telo_list, band_list, cell_means, sample_keys)]
+    
+    results = np.array(results).reshape(len(index), -1, 3)
+    
+    statistics = ['telo means', 'telo median'] + [f'{band} fraction' for band in band_names]
+    if cell_data is not None:
+        statistics.append('cell means median')
+    for j, statistic in enumerate(statistics):
+        if statistic not in df.columns:
+            df[statistic] = results[:, j, 0]
+        df[f'{statistic} ci lower'] = results[:, j, 1]
+        df[f'{statistic} ci upper'] = results[:, j, 2]
+        
+    return df
 
-            elif '2171' in file.name:
-                telos_individ_df_cy3Cal = telos_individ_df.div(80.5)
 
-            elif '7673' in file.name:
-                telos_individ_df_cy3Cal = telos_individ_df.div(2.11)
+def raw_telomere_store(data, raw_telos):
+    # the measured telomeres of every sample of data (dataframe or store), matched by (astro id, timepoint) to the 
+    # {file name: telomeres} ingest dictionary raw_telos; samples missing from it are left empty & reported
+    index = data.index if isinstance(data, ragged_telomere_store) else data
+    index = index[['astro id', 'timepoint', 'flight status']].reset_index(drop=True)
+    raw_of = {parse_sample_key(name_key): telos for name_key, telos in raw_telos.items()}
+    
+    telo_arrays, missing = [], []
+    for astro_id, timepoint in zip(index['astro id'].astype(str), index['timepoint'].astype(str)):
+        telos = raw_of.get((astro_id, timepoint))
+        if telos is None:
+            missing.append(f'{astro_id} {timepoint}')
+            telos = []
+        telo_arrays.append(np.asarray(telos.values if isinstance(telos, (pd.DataFrame, pd.Series)) else telos, 
+                                      dtype='float64').reshape(-1,))
+    if missing:
+        print(f'no raw telomeres for {missing}, their intervals are left empty')
+    return ragged_telomere_store.from_arrays(telo_arrays, index, dtype='float64')
+
+
+def bootstrap_sample_statistics(telos, bands, cell_means, sample_key, n_bands=3, n_boot=2000, ci=0.95, 
+                                seed=0, chunk_size=None, cell_median=False):
+    """
+    One sample of bootstrap_telomere_cis: returns an (n statistics, 3) array of (estimate, ci lower, ci upper) 
+    for the mean, the telomere median, n_bands band fractions & w/ cell_median the median of the cell means. 
+    bands is each telomere's band (None if the sample has no baseline cutoffs) & cell_means the sample's per 
+    cell means, or None to bootstrap the mean over telomeres (the cell means median is then left NaN).
+    """
+    
+    results = np.full((2 + n_bands + cell_median, 3), np.nan)
+    
+    telos = np.asarray(telos, dtype='float64')
+    measured = ~np.isnan(telos)
+    telos = telos[measured]
+    if bands is not None:
+        bands = bands[measured]
+        
+    units = telos if cell_means is None else np.asarray(cell_means, dtype='float64')
+    units = units[~np.isnan(units)]
+    # cell means can't be put back on the telomeres' scale w/o telomeres
+    if len(units) == 0 or len(telos) == 0:
+        return results
+    
+    # per cell means are normalized by CONTROL_MEAN_TELOMERE_LENGTH, put them back on the telomeres' scale
+    if cell_means is not None and len(telos):
+        units = units * (telos.mean() / units.mean())
+    
+    rng = np.random.default_rng([seed, zlib.crc32(str(sample_key).encode('utf-8'))])
+    if chunk_size is None:
+        chunk_size = max(1, 2**22 // max(len(units), len(telos)))
+        
+    replicates = np.full((n_boot, len(results)), np.nan)
+    for start in range(0, n_boot, chunk_size):
+        stop = min(start + chunk_size, n_boot)
+        
+        indices = rng.integers(0, len(units), (stop - start, len(units)))
+        resampled = units[indices]
+        replicates[start:stop, 0] = resampled.mean(axis=1)
+        
+        if cell_means is not None:
+            if cell_median:
+                replicates[start:stop, -1] = np.median(resampled, axis=1)
+            if len(telos) == 0:
+                continue
+            # the median & band fractions are redrawn over telomeres
+            indices = rng.integers(0, len(telos), (stop - start, len(telos)))
+            resampled = telos[indices]
+        replicates[start:stop, 1] = np.median(resampled, axis=1)
+        
+        if bands is not None:
+            # counts per (replicate, band) in one bincount over the whole chunk
+            rows = np.repeat(np.arange(stop - start), len(telos))
+            counts = np.bincount(rows * n_bands + bands[indices].reshape(-1,), minlength=(stop - start) * n_bands)
+            replicates[start:stop, 2:2 + n_bands] = counts.reshape(-1, n_bands) / len(telos)
+    
+    results[0, 0] = units.mean()
+    if len(telos):
+        results[1, 0] = np.median(telos)
+    if cell_median and cell_means is not None:
+        results[-1, 0] = np.median(units)
+    if bands is not None and len(telos):
+        results[2:2 + n_bands, 0] = np.bincount(bands, minlength=n_bands) / len(telos)
+        
+    alpha = (1 - ci) / 2
+    results[:, 1:] = np.quantile(replicates, [alpha, 1 - alpha], axis=0).T
+    return results
+
+
+class ragged_telomere_store:
+    """
+    Telomere lengths for many samples in one flat values buffer (float32 by default): sample i's telomeres are 
+    values[offsets[i]:offsets[i + 1]] & row i of index (astro id / timepoint / flight status) describes it.
+    store[i] returns a numpy view into the buffer, so handing the samples to a dataframe column (to_column) 
+    costs one array header per sample instead of a pd.Series, & whole store operations (means, lengths) 
+    are vectorized over the buffer.
+    """
+    
+    def __init__(self, values, offsets, index):
+        self.values = values
+        self.offsets = np.asarray(offsets, dtype='int64')
+        self.index = index.reset_index(drop=True)
+        
+    @classmethod
+    def from_arrays(cls, telo_arrays, index, dtype='float32'):
+        telo_arrays = [np.asarray(telos, dtype=dtype).reshape(-1,) for telos in telo_arrays]
+        offsets = np.zeros(len(telo_arrays) + 1, dtype='int64')
+        offsets[1:] = np.cumsum([len(telos) for telos in telo_arrays])
+        values = np.concatenate(telo_arrays) if telo_arrays else np.empty(0, dtype=dtype)
+        return cls(values, offsets, index)
+    
+    @classmethod
+    def from_dict(cls, dict_telos_dfs, dtype='float32'):
+        # {file name: single column dataframe} as returned by the generate/grab dictionary functions
+        return cls.from_arrays([telos.values for telos in dict_telos_dfs.values()], 
+                               telomere_sample_index(dict_telos_dfs.keys()), dtype=dtype)
+    
+    def __len__(self):
+        return len(self.offsets) - 1
+    
+    def __getitem__(self, i):
+        return self.values[self.offsets[i]:self.offsets[i + 1]]
+    
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+    
+    @property
+    def lengths(self):
+        return np.diff(self.offsets)
+    
+    @property
+    def nbytes(self):
+        return self.values.nbytes + self.offsets.nbytes
+    
+    def sample_ids(self):
+        # position of each value's sample, i.e for grouped reductions over the buffer
+        return np.repeat(np.arange(len(self)), self.lengths)
+    
+    def means(self):
+        # summed in float64 so a float32 buffer gives the same means as the original float64 values
+        sums = np.bincount(self.sample_ids(), weights=self.values.astype('float64'), minlength=len(self))
+        with np.errstate(invalid='ignore', divide='ignore'):
+            return sums / self.lengths
+    
+    def take(self, positions):
+        # new store w/ the samples reordered/subset, buffer laid out in the new order
+        positions = np.asarray(positions, dtype='int64')
+        return ragged_telomere_store.from_arrays([self[i] for i in positions], self.index.iloc[positions], 
+                                                 dtype=self.values.dtype)
+    
+    def to_column(self, index=None):
+        # object column of numpy views into the buffer, one per sample
+        column = np.empty(len(self), dtype=object)
+        for i in range(len(self)):
+            column[i] = self[i]
+        return pd.Series(column, index=index)
+    
+    
+def write_telomere_memmap(dict_telos_dfs, file_path):
+    """
+    USAGE:
+    write_telomere_memmap({**dict_astro_individ_telos_dfs, **dict_mean_individ_telos_dfs}, 'all_telos')
+    store = open_telomere_memmap('all_telos')
+    
+    Writes the calibrated telomeres of every sample in {file name: single column dataframe} one after the other 
+    as raw float32 to file_path + '.f32', w/ a sidecar file_path + '.index.csv' of 
+    (sample name, sample id, timepoint, flight status, start, length) per sample. Samples are written one at a 
+    time, so the full dataset is never held in memory. Returns the two paths.
+    """
+    
+    index = telomere_sample_index(dict_telos_dfs.keys()).rename(columns={'astro id': 'sample id'})
+    index.insert(0, 'sample name', list(dict_telos_dfs.keys()))
+    
+    lengths = []
+    with open(f'{file_path}.f32', 'wb') as f:
+        for telos in dict_telos_dfs.values():
+            telos = np.asarray(telos.values if isinstance(telos, (pd.DataFrame, pd.Series)) else telos, 
+                               dtype='float32').reshape(-1,)
+            f.write(telos.tobytes())
+            lengths.append(len(telos))
+    
+    index['length'] = np.array(lengths, dtype='int64')
+    index['start'] = np.cumsum(index['length']) - index['length']
+    index = index[['sample name', 'sample id', 'timepoint', 'flight status', 'start', 'length']]
+    index.to_csv(f'{file_path}.index.csv', index=False)
+    
+    return f'{file_path}.f32', f'{file_path}.index.csv'
 
-            elif '2479' in file.name:
-                telos_individ_df_cy3Cal = telos_individ_df.div(2.18)
 
-            elif '1261' in file.name:
-                telos_individ_df_cy3Cal = telos_individ_df.div(2.16)
+def open_telomere_memmap(file_path):
+    """
+    Opens a dataset written by write_telomere_memmap as a ragged_telomere_store whose values buffer is a 
+    read only np.memmap of file_path + '.f32': store[i] is a view straight into the file, so kernels & worker 
+    processes opening the same file share the OS page cache instead of each loading their own copy.
+    The store's index is the sidecar table, w/ 'sample id' as 'astro id' like every other store, so the 
+    store works w/ quantile_band_counts, make_quartiles_columns, bootstrap_telomere_cis, the histogram drivers etc.
+    """
+    
+    index = pd.read_csv(f'{file_path}.index.csv', dtype={'sample name': str, 'sample id': str, 'timepoint': str})
+    index = index.rename(columns={'sample id': 'astro id'})
+    index['timepoint'] = pd.Categorical(index['timepoint'], categories=TIMEPOINT_ORDER)
+    
+    offsets = np.zeros(len(index) + 1, dtype='int64')
+    offsets[1:] = np.cumsum(index['length'].to_numpy())
+    if not np.array_equal(offsets[:-1], index['start'].to_numpy()):
+        raise ValueError(f'{file_path}.index.csv: samples are not stored back to back')
+    
+    if offsets[-1] == 0:
+        values = np.empty(0, dtype='float32')
+    else:
+        values = np.memmap(f'{file_path}.f32', dtype='float32', mode='r', shape=(offsets[-1],))
+    return ragged_telomere_store(values, offsets, index)
 
-            else:
-                telos_individ_df_cy3Cal = telos_individ_df
-            
-            telos_individ_df_cy3Cal = telos_individ_df_cy3Cal.div(116.1848153)
 
-            file_name_trimmed = file.name.replace('.xlsx', '')
-            dict_astro_individ_telos_dfs[file_name_trimmed] = telos_individ_df_cy3Cal
+def telomere_cell_numbers(row_labels, template=None):
+    # metaphase (cell) of each pd.read_excel row label, counted from 0 (see telometer_telomere_row_mask)
+    if template is None:
+        template = TELOMETER_TEMPLATE
+    return (np.asarray(row_labels, dtype='int64') - template['dapi_row']) // template['rows_per_cell']
 
-    print('Done collecting all astronaut telomere length excel files')
-    return dict_astro_individ_telos_dfs
 
+class telomere_sufficient_stats:
+    """
+    USAGE:
+    telo_stats = telomere_sufficient_stats.from_dict(dict_astro_individ_telos_dfs)
+    telo_stats.update(dict_new_astro_individ_telos_dfs)
+    anova_df, tukey_df = batch_anova_post_hoc_tests(telo_stats, by='astro id', flight_status_col='flight status')
+    
+    n, sum & sum of squares of the telomeres per (astro id, timepoint, cell), which is all ANOVAs, Tukey HSD 
+    & group means need: table has one row per sample & cell (sample name, astro id, timepoint, flight status, 
+    cell, n, sum, sum of squares), a few dozen rows per sample instead of thousands of telomeres. Cells come 
+    from the telomeres' excel row labels (telomere_cell_numbers), so build it from the ingest dictionaries 
+    before any resampling; update raises a ValueError for frames whose index isn't unique telometer row labels. 
+    update adds samples as their files arrive, replacing samples already in the table.
+    
+    group_sufficient_stats, anova_from_sufficient_stats, tukey_hsd_from_sufficient_stats, 
+    batch_anova_post_hoc_tests, telos_scipy_anova_post_hoc_tests & merge_analyte_telomere_data accept it 
+    in place of the raw dataframe.
+    """
+    
+    columns = ['sample name', 'astro id', 'timepoint', 'flight status', 'cell', 'n', 'sum', 'sum of squares']
+    
+    def __init__(self, table=None, template=None):
+        self.template = template
+        self.table = pd.DataFrame(columns=self.columns) if table is None else table.reset_index(drop=True)
+    
+    @classmethod
+    def from_dict(cls, dict_telos_dfs, template=None):
+        telo_stats = cls(template=template)
+        telo_stats.update(dict_telos_dfs)
+        return telo_stats
+    
+    def __len__(self):
+        return len(self.table)
+    
+    def sample_names(self):
+        return list(self.table['sample name'].unique())
+    
+    def update(self, dict_telos_dfs):
+        # (re)computes the rows of every sample in {file name: single column dataframe}
+        name_keys = list(dict_telos_dfs.keys())
+        if len(name_keys) == 0:
+            return self
+        
+        # cells come from the excel row labels, which resampling (i.e grab_control_values_generate_dictionary) 
+        # duplicates or resets, so only frames still labeled by unique telomere rows are accepted
+        relabeled = [name_key for name_key in name_keys 
+                     if not (dict_telos_dfs[name_key].index.is_unique and 
+                             telometer_telomere_row_mask(dict_telos_dfs[name_key].index, self.template).all())]
+        if relabeled:
+            raise ValueError(f'{relabeled} are not indexed by their telometer row labels (resampled?).. '
+                             f'build the table from the cleaned telomeres before resampling')
+        
+        values = [dict_telos_dfs[name_key].iloc[:, 0].to_numpy(dtype='float64') for name_key in name_keys]
+        cells = [telomere_cell_numbers(dict_telos_dfs[name_key].index, self.template) for name_key in name_keys]
+        all_values = np.concatenate(values)
+        
+        grouped = pd.DataFrame({'sample': np.repeat(np.arange(len(name_keys)), [len(telos) for telos in values]),
+                                'cell': np.concatenate(cells), 'value': all_values, 'value squared': all_values ** 2})
+        grouped = grouped.dropna(subset=['value']).groupby(['sample', 'cell'])
+        sample_rows = pd.concat([grouped['value'].count(), grouped['value'].sum(), grouped['value squared'].sum()], axis=1)
+        sample_rows.columns = ['n', 'sum', 'sum of squares']
+        sample_rows = sample_rows.reset_index()
+        
+        sample_index = telomere_sample_index(name_keys)
+        sample_index.insert(0, 'sample name', name_keys)
+        sample_rows = sample_index.iloc[sample_rows['sample'].to_numpy()].reset_index(drop=True).join(sample_rows.drop('sample', axis=1))
+        
+        table = self.table[~self.table['sample name'].isin(name_keys)]
+        table = pd.concat([table, sample_rows[self.columns]], ignore_index=True, sort=False)
+        table = table.astype({'cell': 'int64', 'n': 'int64', 'sum': 'float64', 'sum of squares': 'float64'})
+        table['timepoint'] = pd.Categorical(table['timepoint'], categories=TIMEPOINT_ORDER)
+        self.table = table.sort_values(['astro id', 'timepoint', 'cell']).reset_index(drop=True)
+        return self
+    
+    def remove(self, name_keys):
+        self.table = self.table[~self.table['sample name'].isin(list(name_keys))].reset_index(drop=True)
+        return self
+    
+    def select(self, astro_ids):
+        # new table w/ only these astronauts
+        return telomere_sufficient_stats(self.table[self.table['astro id'].isin([str(astro_id) for astro_id in astro_ids])], 
+                                         template=self.template)
+    
+    def aggregate(self, group_cols):
+        # n, sum & sum of squares per group, same table as group_sufficient_stats
+        stats_df = self.table.groupby(group_cols, sort=False, observed=True)[['n', 'sum', 'sum of squares']].sum()
+        return stats_df.reset_index()
+    
+    def means(self, group_cols, name='telo means', per_sample=False):
+        # pooled mean of every telomere in each group, or w/ per_sample the mean of the group's per sample means
+        if per_sample:
+            stats_df = self.aggregate(['sample name'] + list(group_cols))
+            stats_df[name] = stats_df['sum'] / stats_df['n']
+            return stats_df.groupby(group_cols, sort=False, observed=True)[name].mean().reset_index()
+        
+        stats_df = self.aggregate(group_cols)
+        stats_df[name] = stats_df['sum'] / stats_df['n']
+        return stats_df.drop(['n', 'sum', 'sum of squares'], axis=1)
+    
+    def save(self, file_path):
+        self.table.to_csv(file_path, index=False)
+        
+    @classmethod
+    def load(cls, file_path, template=None):
+        table = pd.read_csv(file_path, dtype={'sample name': str, 'astro id': str, 'timepoint': str})
+        table['timepoint'] = pd.Categorical(table['timepoint'], categories=TIMEPOINT_ORDER)
+        return cls(table, template=template)
 
-def raincloud_plot_astros_groups(x=None, y=None, data=None, 
-                                 groupby=None, iterable=None):
+
+def telomere_store_dataframe(data, telo_arrays, columns, telo_col, sort_by, dtype='float32'):
+    """
+    Builds the make_*_dataframe dataframes: data holds the rows w/o the telomere column, telo_arrays each 
+    row's telomeres. Rows are sorted by sort_by, the telomeres are packed in that order into a 
+    ragged_telomere_store & the telo_col column holds views into it. Returns (dataframe, store).
+    """
     
-    group_df = data.groupby(groupby)
+    df = pd.DataFrame(data, columns=[col for col in columns if col != telo_col])
+    df['timepoint'] = pd.Categorical(df['timepoint'], categories=TIMEPOINT_ORDER)
+    df = df.sort_values(sort_by)
     
-    for item in iterable:
-        plot_df = group_df.get_group(item)
-        if x == 'timepoint':
-        #this line only needed for timepoint
-            plot_df[x].cat.remove_unused_categories(inplace=True)
+    order = df.index.to_numpy()
+    df = df.reset_index(drop=True)
     
-        ax = sns.set(font_scale=1)
-        #bw = sigma
-        ax = pt.RainCloud(x = x, y = y, data = plot_df, palette = "Set2", bw = .20, 
-                     width_viol = .8, figsize = (8,6), move=0.21, orient = "h")
-        plt.title(f'{item} telos', fontsize=16)        
+    id_col = 'astro id' if 'astro id' in df.columns else 'control id'
+    flight_col = 'flight status' if 'flight status' in df.columns else 'flight status controls'
+    store_index = df[[id_col, 'timepoint', flight_col]].copy()
+    store_index.columns = ['astro id', 'timepoint', 'flight status']
+    
+    store = ragged_telomere_store.from_arrays([telo_arrays[i] for i in order], store_index, dtype=dtype)
+    df.insert(columns.index(telo_col), telo_col, store.to_column(index=df.index))
+    return df, store
     
         
-def make_astronaut_dataframe(dict_astro_individ_telos_dfs):
+def make_astronaut_dataframe(dict_astro_individ_telos_dfs, return_store=False, seed=0):
+    """
+    'telo data' holds float32 numpy views into a ragged_telomere_store, returned as well if return_store=True.
+    Every sample is normalized to 30 cells * 184 telomeres in one batch w/ resample_telomere_indices (seed).
+    """
+    
     data = []
+    telo_arrays = []
     
-    for name_key, telo_value in dict_astro_individ_telos_dfs.items():
+    raw_telo_arrays = [telo_value.values.reshape(-1,) for telo_value in dict_astro_individ_telos_dfs.values()]
+    sample_indices = resample_telomere_indices([len(telos) for telos in raw_telo_arrays], 
+                                               list(dict_astro_individ_telos_dfs.keys()), 30, 184, 'rsamp', seed=seed)
+    
+    for name_key, telos, indices in zip(dict_astro_individ_telos_dfs.keys(), raw_telo_arrays, sample_indices):
         astro_id = name_key[3:7]
         astro_num, synth = get_astro_number_from_id(astro_id)
         time_point = get_timepoint(name_key)
         flight_status = relative_flight_timepoint(name_key)
-        telo_value = gen_missing_values_andimpute_or_randomsampledown(30, 184, pd.Series(telo_value.values.reshape(-1,)), 'rsamp')
-        data.append([astro_num, astro_id, time_point, flight_status, telo_value, np.mean(telo_value.values)])
+        telo_value = telos[indices]
+        data.append([astro_num, astro_id, time_point, flight_status, np.mean(telo_value)])
+        telo_arrays.append(telo_value)
 
-    astro_df = pd.DataFrame(data, columns = ['astro number', 'astro id', 'timepoint', 'flight status', 'telo data', 'telo means'])
-
-    sorter = ['L-270', 'L-180', 'L-60', 'FD45', 'FD90', 'FD140', 'FD260', 'R+5', 'R+7', 'R+60', 'R+105', 'R+180', 'R+270']
-    astro_df['timepoint'] = astro_df['timepoint'].astype('category')
-    astro_df['timepoint'].cat.set_categories(sorter, inplace=True)
+    astro_df, store = telomere_store_dataframe(data, telo_arrays, 
+                                               ['astro number', 'astro id', 'timepoint', 'flight status', 'telo data', 'telo means'],
+                                               'telo data', ['astro number', 'timepoint'])
 
     astro_df['Q1'] = 'telos preF Q1 <0.25'
     astro_df['Q2-3'] = 'telos preF Q2-3 >0.25 & <0.75'
     astro_df['Q4'] = 'telos preF Q4 >0.75'
-
-    astro_df = astro_df.sort_values(['astro number', 'timepoint']).reset_index(drop=True)
     
+    if return_store:
+        return astro_df, store
     return astro_df
 
 
-def make_astronaut_cell_data_dataframe(dict_astro_individ_telos_dfs):
+def make_astronaut_cell_data_dataframe(dict_astro_individ_telos_dfs, return_store=False):
     data = []
+    telo_arrays = []
     
     for name_key, telo_value in dict_astro_individ_telos_dfs.items():
         astro_id = name_key[3:7]
         astro_num, synth = get_astro_number_from_id(astro_id)
         time_point = get_timepoint(name_key)
         flight_status = relative_flight_timepoint(name_key)
-        telo_value = pd.Series(telo_value.values.reshape(-1,))
+        telo_value = telo_value.values.reshape(-1,)
 
-        data.append([astro_num, astro_id, time_point, flight_status, telo_value, np.mean(telo_value.values)])
+        data.append([astro_num, astro_id, time_point, flight_status, np.mean(telo_value)])
+        telo_arrays.append(telo_value)
 
-    astro_df = pd.DataFrame(data, columns = ['astro number', 'astro id', 'timepoint', 'flight status', 'telo data per cell', 'telo means'])
-
-    sorter = ['L-270', 'L-180', 'L-60', 'FD45', 'FD90', 'FD140', 'FD260', 'R+5', 'R+7', 'R+60', 'R+105', 'R+180', 'R+270']
-    astro_df['timepoint'] = astro_df['timepoint'].astype('category')
-    astro_df['timepoint'].cat.set_categories(sorter, inplace=True)
+    astro_df, store = telomere_store_dataframe(data, telo_arrays, 
+                                               ['astro number', 'astro id', 'timepoint', 'flight status', 'telo data per cell', 'telo means'],
+                                               'telo data per cell', ['astro number', 'timepoint'])
 
     astro_df['Q1'] = 'telos preF Q1 <0.25'
     astro_df['Q2-3'] = 'telos preF Q2-3 >0.25 & <0.75'
     astro_df['Q4'] = 'telos preF Q4 >0.75'
-
-    astro_df = astro_df.sort_values(['astro number', 'timepoint']).reset_index(drop=True)
     
+    if return_store:
+        return astro_df, store
     return astro_df
         
     
-def make_control_dataframe(dict_astro_individ_telos_dfs):
+def make_control_dataframe(dict_astro_individ_telos_dfs, return_store=False):
     data = []
+    telo_arrays = []
     
     for name_key, telo_value in dict_astro_individ_telos_dfs.items():
         astro_id = name_key[3:7]
 #         astro_num, synth = get_astro_number_from_id(astro_id)
         time_point = get_timepoint(name_key)
         flight_status = relative_flight_timepoint(name_key)
-        telo_value = pd.Series(telo_value.values.reshape(-1,))
+        telo_value = telo_value.values.reshape(-1,)
 
-        data.append([astro_id, time_point, flight_status, telo_value, np.mean(telo_value.values)])
+        data.append([astro_id, time_point, flight_status, np.mean(telo_value)])
+        telo_arrays.append(telo_value)
 
-    astro_df = pd.DataFrame(data, columns = ['control id', 'timepoint', 'flight status controls', 'telo data', 'telo means'])
-
-    sorter = ['L-270', 'L-180', 'L-60', 'FD45', 'FD90', 'FD140', 'FD260', 'R+5', 'R+7', 'R+60', 'R+105', 'R+180', 'R+270']
-    astro_df['timepoint'] = astro_df['timepoint'].astype('category')
-    astro_df['timepoint'].cat.set_categories(sorter, inplace=True)
-
-    astro_df = astro_df.sort_values(['control id', 'timepoint']).reset_index(drop=True)
+    astro_df, store = telomere_store_dataframe(data, telo_arrays, 
+                                               ['control id', 'timepoint', 'flight status controls', 'telo data', 'telo means'],
+                                               'telo data', ['control id', 'timepoint'])
     
+    if return_store:
+        return astro_df, store
     return astro_df
 
 
-def make_control_cell_data_dataframe(dict_astro_individ_telos_dfs):
+def make_control_cell_data_dataframe(dict_astro_individ_telos_dfs, return_store=False):
     data = []
+    telo_arrays = []
     
     for name_key, telo_value in dict_astro_individ_telos_dfs.items():
         astro_id = name_key[3:7]
 #         astro_num, synth = get_astro_number_from_id(astro_id)
         time_point = get_timepoint(name_key)
         flight_status = relative_flight_timepoint(name_key)
-        telo_value = pd.Series(telo_value.values.reshape(-1,))
+        telo_value = telo_value.values.reshape(-1,)
 
-        data.append([astro_id, time_point, flight_status, telo_value, np.mean(telo_value.values)])
+        data.append([astro_id, time_point, flight_status, np.mean(telo_value)])
+        telo_arrays.append(telo_value)
 
-    astro_df = pd.DataFrame(data, columns = ['control id', 'timepoint', 'flight status controls', 'telo data per cell', 'telo means'])
+    astro_df, store = telomere_store_dataframe(data, telo_arrays, 
+                                               ['control id', 'timepoint', 'flight status controls', 'telo data per cell', 'telo means'],
+                                               'telo data per cell', ['control id', 'timepoint'])
+    
+    if return_store:
+        return astro_df, store
+    return astro_df
+        
 
-    sorter = ['L-270', 'L-180', 'L-60', 'FD45', 'FD90', 'FD140', 'FD260', 'R+5', 'R+7', 'R+60', 'R+105', 'R+180', 'R+270']
-    astro_df['timepoint'] = astro_df['timepoint'].astype('category')
-    astro_df['timepoint'].cat.set_categories(sorter, inplace=True)
+def save_telomere_dataframe(df, file_path):
+    """
+    USAGE:
+    save_telomere_dataframe(astro_df, 'All_astronauts_telomere_length_dataframe.npz')
+    astro_df = load_telomere_dataframe('All_astronauts_telomere_length_dataframe.npz')
+    
+    Persists a make_*_dataframe dataframe (astronaut, per cell or control) in a binary, column by column .npz 
+    file instead of writing the telomere arrays as python list literals into a .csv. Columns of telomere arrays 
+    are stored as one flat values buffer + offsets, categoricals as codes + categories, text columns as fixed 
+    width strings & numeric columns (including object columns of numbers) as is; numbers in mixed object 
+    columns come back as numbers. Nothing is pickled, so loading needs no literal_eval.
+    """
+    
+    arrays = {'columns': np.array([str(col) for col in df.columns])}
+    
+    for i, col in enumerate(df.columns):
+        key = f'column {i}'
+        column = df[col]
+        
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            arrays[f'{key}|codes'] = column.cat.codes.to_numpy()
+            arrays[f'{key}|categories'] = np.array([str(category) for category in column.cat.categories])
+            arrays[f'{key}|ordered'] = np.array(column.cat.ordered)
+            
+        elif column.dtype == object and len(column) > 0 and isinstance(column.iloc[0], (np.ndarray, pd.Series, list)):
+            telo_arrays = [np.asarray(telos).reshape(-1,) for telos in column]
+            offsets = np.zeros(len(telo_arrays) + 1, dtype='int64')
+            offsets[1:] = np.cumsum([len(telos) for telos in telo_arrays])
+            arrays[f'{key}|values'] = np.concatenate(telo_arrays)
+            arrays[f'{key}|offsets'] = offsets
+            
+        elif column.dtype == object and column.infer_objects().dtype != object:
+            # object columns holding only numbers, i.e the Q1 / Q2-3 / Q4 counts of make_quartiles_columns
+            arrays[f'{key}|data'] = column.infer_objects().to_numpy()
+            
+        elif column.dtype == object:
+            missing = column.isna().to_numpy()
+            arrays[f'{key}|strings'] = np.array(['' if is_missing else str(value) for value, is_missing in zip(column, missing)])
+            arrays[f'{key}|missing'] = missing
+            arrays[f'{key}|numeric'] = np.array([isinstance(value, (int, float, np.number)) and not isinstance(value, bool) 
+                                                 and not is_missing for value, is_missing in zip(column, missing)], dtype=bool)
+            
+        else:
+            arrays[f'{key}|data'] = column.to_numpy()
+            
+    np.savez(file_path, **arrays)
+    
 
-    astro_df = astro_df.sort_values(['control id', 'timepoint']).reset_index(drop=True)
+def load_telomere_dataframe(file_path):
+    """
+    Loads a dataframe written by save_telomere_dataframe. Telomere columns come back as numpy views into a 
+    ragged_telomere_store (the same layout make_*_dataframe produces), the timepoint column as a categorical.
+    """
     
-    return astro_df
+    with np.load(file_path, allow_pickle=False) as saved:
+        saved = dict(saved)
+    
+    df = pd.DataFrame()
+    for i, col in enumerate(saved['columns']):
+        key = f'column {i}'
         
+        if f'{key}|codes' in saved:
+            df[col] = pd.Categorical.from_codes(saved[f'{key}|codes'], categories=list(saved[f'{key}|categories']),
+                                                ordered=bool(saved[f'{key}|ordered']))
+            
+        elif f'{key}|values' in saved:
+            offsets = saved[f'{key}|offsets']
+            store = ragged_telomere_store(saved[f'{key}|values'], offsets, pd.DataFrame(index=range(len(offsets) - 1)))
+            df[col] = store.to_column()
+            
+        elif f'{key}|strings' in saved:
+            strings = saved[f'{key}|strings'].astype(object)
+            strings[saved[f'{key}|missing']] = None
+            numeric = saved.get(f'{key}|numeric', np.zeros(len(strings), dtype=bool))
+            strings[numeric] = [int(value) if value.lstrip('-').isdigit() else float(value) for value in strings[numeric]]
+            df[col] = strings
+            
+        else:
+            df[col] = saved[f'{key}|data']
+            
+    return df
+
+
+def explode_telo_data(df, telo_col='telo data', exploded_col=None, drop_cols=['Q1', 'Q2-3', 'Q4']):
+    """
+    USAGE:
+    exploded_telos_astro_df = explode_telo_data(astro_df)
+    exploded_cells_astro_df = explode_telo_data(astro_cells_df, telo_col='telo data per cell')
+    
+    Long form of a make_*_dataframe dataframe: one row per telomere (or per cell), w/ the remaining columns 
+    (minus telo_col & drop_cols) repeated by the length of each row's array & the arrays concatenated into 
+    exploded_col ('telo data exploded' for 'telo data', otherwise telo_col). Same rows as 
+    df[telo_col].apply(pd.Series) merged back & melted, w/o building the wide frame; rows are ordered 
+    sample by sample rather than by position in the array.
+    """
+    
+    if exploded_col is None:
+        exploded_col = 'telo data exploded' if telo_col == 'telo data' else telo_col
+    
+    id_cols = [col for col in df.columns if col != telo_col and col not in drop_cols]
+    telo_arrays = [np.asarray(telos).reshape(-1,) for telos in df[telo_col]]
+    lengths = np.array([len(telos) for telos in telo_arrays], dtype='int64')
+    
+    exploded_df = df[id_cols].iloc[np.repeat(np.arange(len(df)), lengths)].reset_index(drop=True)
+    exploded_df[exploded_col] = np.concatenate(telo_arrays) if telo_arrays else np.empty(0)
+    
+    return exploded_df.dropna(subset=[exploded_col]).reset_index(drop=True)
+
 
 def mid_split(row):
     if 'FD90' in row or 'FD45' in row:
@@ -910,8 +1978,64 @@ def initialize_telo_data_timepoint_or_blank(timepoint, df):
 ########################################################################################################################
     
             
+def figure_cache_key(plot_name, inputs):
+    """
+    Hash of a figure's inputs ({argument name: value}): dataframes/series are hashed by their columns, index & values,
+    arrays by their bytes, everything else (plotting parameters) by repr. Used w/ figure_is_cached to skip re-rendering 
+    figures whose data slice & parameters haven't changed.
+    """
+    
+    sha1 = hashlib.sha1(plot_name.encode('utf-8'))
+    for name in sorted(inputs):
+        item = inputs[name]
+        sha1.update(name.encode('utf-8'))
+        
+        if isinstance(item, (pd.DataFrame, pd.Series)):
+            sha1.update(repr(list(item.columns) if isinstance(item, pd.DataFrame) else item.name).encode('utf-8'))
+            try:
+                sha1.update(pd.util.hash_pandas_object(item, index=True).to_numpy().tobytes())
+            except TypeError:
+                # unhashable cells, i.e arrays of telomeres
+                sha1.update(item.to_json(default_handler=str).encode('utf-8'))
+        elif isinstance(item, np.ndarray):
+            sha1.update(str(item.dtype).encode('utf-8') + str(item.shape).encode('utf-8') + np.ascontiguousarray(item).tobytes())
+        else:
+            sha1.update(repr(item).encode('utf-8'))
+            
+    return sha1.hexdigest()
+
+
+def figure_is_cached(file_path, cache_key):
+    # the figure exists & was saved from the same inputs (key kept in a sidecar file next to it)
+    key_path = f'{file_path}.cache-key'
+    if not os.path.exists(file_path) or not os.path.exists(key_path):
+        return False
+    with open(key_path) as f:
+        return f.read().strip() == cache_key
+    
+
+def save_figure_cache_key(file_path, cache_key):
+    # called after every save of a cacheable figure: w/o a key (figure_cache off) the old sidecar no longer 
+    # describes the file on disk, so it's removed
+    key_path = f'{file_path}.cache-key'
+    if cache_key is None:
+        if os.path.exists(key_path):
+            os.remove(key_path)
+        return
+    with open(key_path, 'w') as f:
+        f.write(cache_key)
+
+
 def graph_four_histograms(quartile_ref, n_bins, df1, df2, df3, df4,
-                                                name1, name2, name3, name4):
+                                                name1, name2, name3, name4, save_path=None, figure_cache=False):
+    
+    # figure_cache=True (w/ save_path) skips rendering if save_path was already drawn from the same inputs
+    if save_path is not None and figure_cache:
+        cache_key = figure_cache_key('graph_four_histograms', {key: value for key, value in locals().items() 
+                                                               if key not in ['save_path', 'figure_cache']})
+        if figure_is_cached(save_path, cache_key):
+            print(f'{save_path} unchanged, skipping..')
+            return
     
     n_bins = n_bins
     fig, axs = plt.subplots(2,2, sharey=True, sharex=True, constrained_layout=True, figsize = (8, 6))
@@ -929,6 +2053,10 @@ def graph_four_histograms(quartile_ref, n_bins, df1, df2, df3, df4,
     astronaut_histogram_stylizer_divyBins_byQuartile(fig, axs, n_bins, df3, quartile_ref, name3, 1, 0)
     astronaut_histogram_stylizer_divyBins_byQuartile(fig, axs, n_bins, df4, quartile_ref, name4, 1, 1)
     
+    if save_path is not None:
+        plt.savefig(save_path, dpi=600, bbox_inches='tight')
+        save_figure_cache_key(save_path, cache_key if figure_cache else None)
+    
     
 def graph_two_histograms(quartile_ref, n_bins, df1, df2,
                                                name1, name2, controls=None):
@@ -956,25 +2084,23 @@ def graph_two_histograms(quartile_ref, n_bins, df1, df2,
 #                      y=.95, fontsize=14, **csfont)
 
     
-def astronaut_histogram_stylizer_divyBins_byQuartile(fig, axs, n_bins, astroDF, astroquartile, astroname, axsNUMone, axsNUMtwo):
-
-    astroDF = astroDF.to_numpy()
-    astroquartile = astroquartile.to_numpy()
-
-    N, bins, patches = axs[axsNUMone,axsNUMtwo].hist(astroDF, bins=n_bins, range=(0, 400), edgecolor='black')
+def quartile_bin_colors(bins, astroquartile):
+    # face color per histogram bin, by where the bin's left edge falls relative to the quartiles of astroquartile:
+    # <= 25th percentile yellow, 25th - 75th light blue, > 75th pink
+    quartile_cutoffs = np.quantile(np.asarray(astroquartile, dtype='float64'), [0.25, 0.75])
+    return np.array(['#fdff38', '#d0fefe', '#ffbacd'])[np.digitize(bins[:-1], quartile_cutoffs, right=True)]
 
-    for a in range(len(patches)):
-        if bins[a] <= np.quantile(astroquartile, 0.25):
-            patches[a].set_facecolor('#fdff38')
 
-        elif np.quantile(astroquartile, 0.25) < bins[a] and bins[a] <= np.quantile(astroquartile, 0.50):
-            patches[a].set_facecolor('#d0fefe')
+def quartile_colored_histogram(ax, n_bins, astroDF, astroquartile):
+    # bins the telomeres once & draws every bar, already colored, in one call
+    counts, bins = np.histogram(np.asarray(astroDF, dtype='float64'), bins=n_bins, range=(0, 400))
+    ax.bar(bins[:-1], counts, width=np.diff(bins), align='edge', 
+           color=quartile_bin_colors(bins, astroquartile), edgecolor='black')
 
-        elif np.quantile(astroquartile, 0.50) < bins[a] and bins[a] <= np.quantile(astroquartile, 0.75):
-            patches[a].set_facecolor('#d0fefe')
+    
+def astronaut_histogram_stylizer_divyBins_byQuartile(fig, axs, n_bins, astroDF, astroquartile, astroname, axsNUMone, axsNUMtwo):
 
-        elif bins[a] > np.quantile(astroquartile, 0.75): 
-            patches[a].set_facecolor('#ffbacd')
+    quartile_colored_histogram(axs[axsNUMone,axsNUMtwo], n_bins, astroDF, astroquartile)
 
     modified_astroname = astroname.replace('astro', '')
     axs[axsNUMone,axsNUMtwo].set_title(f"{modified_astroname}", fontsize=16,)
@@ -997,21 +2123,7 @@ def astronaut_histogram_stylizer_divyBins_byQuartile(fig, axs, n_bins, astroDF,
         
 def astronaut_histogram_stylizer_divyBins_byQuartile_2Stacked(fig, axs, n_bins, astroDF, astroquartile, astroname, axsNUMone):
 
-    astroDF = astroDF.to_numpy()
-    astroquartile = astroquartile.to_numpy()
-
-
-    N, bins, patches = axs[axsNUMone].hist(astroDF, bins=n_bins, range=(0, 400), edgecolor='black')
-
-    for a in range(len(patches)):
-        if bins[a] <= np.quantile(astroquartile, 0.25):
-            patches[a].set_facecolor('#fdff38')
-        elif np.quantile(astroquartile, 0.25) < bins[a] and bins[a] <= np.quantile(astroquartile, 0.50):
-            patches[a].set_facecolor('#d0fefe')
-        elif np.quantile(astroquartile, 0.50) < bins[a] and bins[a] <= np.quantile(astroquartile, 0.75):
-            patches[a].set_facecolor('#d0fefe')
-        elif bins[a] > np.quantile(astroquartile, 0.75): 
-            patches[a].set_facecolor('#ffbacd')
+    quartile_colored_histogram(axs[axsNUMone], n_bins, astroDF, astroquartile)
             
     axs[axsNUMone].set_title(f"{astroname}", fontsize=16,)
     
@@ -1025,70 +2137,213 @@ def astronaut_histogram_stylizer_divyBins_byQuartile_2Stacked(fig, axs, n_bins,
     axs[axsNUMone].xaxis.set_major_locator(plt.MaxNLocator(7))
     
     
+class exploded_telo_groups:
+    """
+    Per (astronaut, timepoint) access to an exploded telomere dataframe (one row per telomere, see explode_telo_data).
+    The groupby index is computed once & the telomeres regrouped into one buffer, so each lookup returns a numpy 
+    view of that timepoint's telomeres instead of masking the whole frame; replaces the initialize_*_timepoint 
+    helpers in the histogram drivers. A ragged_telomere_store (i.e from open_telomere_memmap) can be given instead 
+    of the exploded dataframe, its buffer is then used as is w/o copying.
+    """
+    
+    def __init__(self, exploded_telos_df=None, id_col='astro id', telo_col='telo data exploded'):
+        self.id_col = id_col
+        if exploded_telos_df is None:
+            self._set_groups({})
+            return
+        if isinstance(exploded_telos_df, ragged_telomere_store):
+            self._set_store(exploded_telos_df)
+            return
+        
+        keys = pd.DataFrame({'id': exploded_telos_df[id_col].to_numpy(), 
+                             'timepoint': exploded_telos_df['timepoint'].astype(str).to_numpy()})
+        positions = keys.groupby(['id', 'timepoint'], sort=False).indices
+        values = exploded_telos_df[telo_col].to_numpy()
+        self._set_groups({key: values[group_positions] for key, group_positions in positions.items()})
+        
+    def _set_groups(self, groups):
+        # groups: {(astro id, timepoint): telomeres}, packed back to back into self.values
+        self.values = np.concatenate(list(groups.values())) if groups else np.empty(0)
+        self.slices = {}
+        self.timepoints_by_astro = {}
+        start = 0
+        for (astro_id, timepoint), telos in groups.items():
+            self.slices[(astro_id, timepoint)] = slice(start, start + len(telos))
+            self.timepoints_by_astro.setdefault(astro_id, []).append(timepoint)
+            start += len(telos)
+            
+    def _set_store(self, store):
+        # each sample of the store is already one (astro id, timepoint) slice of its buffer
+        self.values = store.values
+        self.slices = {}
+        self.timepoints_by_astro = {}
+        ids = store.index[self.id_col].astype(str).to_numpy()
+        for i, (astro_id, timepoint) in enumerate(zip(ids, store.index['timepoint'].astype(str))):
+            self.slices[(astro_id, timepoint)] = slice(store.offsets[i], store.offsets[i + 1])
+            self.timepoints_by_astro.setdefault(astro_id, []).append(timepoint)
+    
+    def has_astronaut(self, astro_id):
+        return astro_id in self.timepoints_by_astro
+    
+    def timepoints(self, astro_id):
+        return list(self.timepoints_by_astro.get(astro_id, []))
+    
+    def get(self, astro_id, timepoint):
+        # the astronaut's telomeres at timepoint as a view into self.values, or None
+        group_slice = self.slices.get((astro_id, str(timepoint)))
+        return None if group_slice is None else self.values[group_slice]
+    
+    def astronaut(self, astro_id):
+        # a copy holding only astro_id's timepoints, i.e to hand one astronaut to a worker process
+        single_astronaut = exploded_telo_groups(id_col=self.id_col)
+        single_astronaut._set_groups({(astro_id, timepoint): self.get(astro_id, timepoint) 
+                                      for timepoint in self.timepoints(astro_id)})
+        return single_astronaut
+    
+    def first_timepoint(self, astro_id, timepoints=['L-270', 'L-180'], min_size=30):
+        # same as looping initialize_telo_data_1st_timepoint_variable over timepoints until one has > min_size telomeres
+        for timepoint in timepoints:
+            telos = self.get(astro_id, timepoint)
+            if telos is None:
+                telos = pd.DataFrame([[0,1],[0,1]])
+            if telos.size > min_size:
+                break
+        return telos
+    
+    def timepoint_or_blank(self, astro_id, timepoint, name_prefix='dso'):
+        # same as initialize_telo_data_timepoint_or_blank (name_prefix='astro ' for the encoded version)
+        telos = self.get(astro_id, timepoint)
+        if telos is None:
+            return '', pd.DataFrame([0,1],[0,1])
+        return f'{name_prefix}{astro_id} {timepoint}', telos
+    
+    
 def make_histograms_colored_by_quartile_for_astronauts(exploded_telos_df=None, astro_ids=None, nbins=45):
 
 #     astro_ids = ['5163', '2171', '1536', '7673', '4819', '3228', '2494', '2479', '2381', '1261', '1062']
     
-    grouped_data = exploded_telos_df.groupby('astro id')
+    telo_groups = exploded_telo_groups(exploded_telos_df, id_col='astro id')
 
-    # by looping through astronaut ids, we'll pull out their respective dataframes
-    # once we have the astronauts respective dfs, we'll figure out the quartile df & 
+    # by looping through astronaut ids, we'll pull out their respective telomeres
+    # & graph them w/ the first timepoint as the reference for making quartile cutoffs
     for astro_id_num in astro_ids:
         
-        if astro_id_num not in grouped_data.groups.keys():
+        if not telo_groups.has_astronaut(astro_id_num):
             break
-        plot_df = grouped_data.get_group(astro_id_num)
-        for timepoint in ['L-270', 'L-180']:
-            first_timepoint = initialize_telo_data_1st_timepoint_variable(timepoint=timepoint, df=plot_df)
-            if first_timepoint.size > 30:
-                break
-        quartile_ref = first_timepoint
-
-    #     okay, now we have the first timepoint as the reference for making quartile cutoffs! 
-    #     now need to intialize other values!
-
-        name_L270, astro_L270 = initialize_telo_data_timepoint_or_blank('L-270', plot_df)
-        name_L180, astro_L180 = initialize_telo_data_timepoint_or_blank('L-180', plot_df)
-
-        if '5163' == astro_id_num or '1536' == astro_id_num:
-            name_Mid1, astro_Mid1 = initialize_telo_data_timepoint_or_blank('FD90', plot_df)
-            name_Mid2, astro_Mid2 = initialize_telo_data_timepoint_or_blank('FD140', plot_df)
-        if '2171' == astro_id_num:
-            name_Mid1, astro_Mid1 = initialize_telo_data_timepoint_or_blank('FD45', plot_df)
-            name_Mid2, astro_Mid2 = initialize_telo_data_timepoint_or_blank('FD260', plot_df)
-
-        name_R180, astro_R180 = initialize_telo_data_timepoint_or_blank('R+180', plot_df)
-        name_R270, astro_R270 = initialize_telo_data_timepoint_or_blank('R+270', plot_df)
-
-
-        if ('5163' == astro_id_num) or ('2171' == astro_id_num) or ('1536' == astro_id_num):
-            n_bins = n_bins
-
-            if name_L270 != '': 
-                        if name_R270 != '':
-                            graph_four_histograms(quartile_ref, n_bins, astro_L270, astro_Mid1, astro_Mid2, astro_R270,
-                                                                    name_L270, name_Mid1, name_Mid2, name_R270)
-                        elif name_R270 == '':
-                            graph_four_histograms(quartile_ref, n_bins, astro_L270, astro_Mid1, astro_Mid2, astro_R180,
-                                                                    name_L270, name_Mid1, name_Mid2, name_R180)
-            elif name_L270 == '':
-                        if name_R270 != '':
-                            graph_four_histograms(quartile_ref, n_bins, astro_L180, astro_Mid1, astro_Mid2, astro_R270,
-                                                                    name_L180, name_Mid1, name_Mid2, name_R270)
-                        elif name_R270 == '':
-                            graph_four_histograms(quartile_ref, n_bins, astro_L180, astro_Mid1, astro_Mid2, astro_R180,
-                                                                    name_L180, name_Mid1, name_Mid2, name_R180)
-
-        elif astro_id_num in ['7673', '4819', '3228', '2494', '2479', '2381', '1261', '1062']:
-            
-            n_bins = 60
-            graph_two_histograms(quartile_ref, n_bins, astro_L270, astro_R270, name_L270, name_R270)
+        render_astronaut_quartile_histograms(telo_groups, astro_id_num, nbins)
             
         plt.savefig(f'../individual telomere length histogram distributions/png/dso{astro_id_num} histogram of individual telomere length distributions.png', dpi=600)
         
         plt.savefig(f'../individual telomere length histogram distributions/svg/dso{astro_id_num} histogram of individual telomere length distributions.svg', format='svg', dpi=1500)
     
     
+def render_astronaut_quartile_histograms(telo_groups, astro_id_num, n_bins, encoded=False):
+    """
+    Draws one astronaut's individual telomere histograms, colored by the quartiles of their first pre-flight 
+    timepoint: pre/mid/mid/post-flight for the year long mission astronauts, pre/post-flight for the rest (60 bins).
+    telo_groups is an exploded_telo_groups (or an exploded telomere dataframe / ragged_telomere_store); encoded=True 
+    uses the 'encoded astro id' labels (A, B, C). Returns the figure, or None if there's nothing to draw for astro_id_num.
+    """
+    
+    if not isinstance(telo_groups, exploded_telo_groups):
+        telo_groups = exploded_telo_groups(telo_groups, id_col='encoded astro id' if encoded else 'astro id')
+    
+    quartile_ref = telo_groups.first_timepoint(astro_id_num, ['L-270', 'L-180'])
+    name_prefix = 'astro ' if encoded else 'dso'
+    initialize_timepoint = lambda timepoint: telo_groups.timepoint_or_blank(astro_id_num, timepoint, name_prefix=name_prefix)
+    
+    if encoded:
+        mid_flight_timepoints = {'A': ['FD90', 'FD140'], 'C': ['FD90', 'FD140'], 'B': ['FD45', 'FD260']}
+        two_histogram_ids = []
+    else:
+        mid_flight_timepoints = {'5163': ['FD90', 'FD140'], '1536': ['FD90', 'FD140'], '2171': ['FD45', 'FD260']}
+        two_histogram_ids = ['7673', '4819', '3228', '2494', '2479', '2381', '1261', '1062']
+
+    name_L270, astro_L270 = initialize_timepoint('L-270')
+    name_L180, astro_L180 = initialize_timepoint('L-180')
+    name_R180, astro_R180 = initialize_timepoint('R+180')
+    name_R270, astro_R270 = initialize_timepoint('R+270')
+
+    if astro_id_num in mid_flight_timepoints:
+        name_Mid1, astro_Mid1 = initialize_timepoint(mid_flight_timepoints[astro_id_num][0])
+        name_Mid2, astro_Mid2 = initialize_timepoint(mid_flight_timepoints[astro_id_num][1])
+        
+        # L-270 & R+270 when the astronaut has them, otherwise L-180 / R+180
+        name_pre, astro_pre = (name_L270, astro_L270) if name_L270 != '' else (name_L180, astro_L180)
+        name_post, astro_post = (name_R270, astro_R270) if name_R270 != '' else (name_R180, astro_R180)
+        graph_four_histograms(quartile_ref, n_bins, astro_pre, astro_Mid1, astro_Mid2, astro_post,
+                              name_pre, name_Mid1, name_Mid2, name_post)
+
+    elif astro_id_num in two_histogram_ids:
+        graph_two_histograms(quartile_ref, 60, astro_L270, astro_R270, name_L270, name_R270)
+        
+    else:
+        return None
+    
+    return plt.gcf()
+
+
+def export_histograms_colored_by_quartile(exploded_telos_df=None, astro_ids=None, output_dir='.', 
+                                          formats=['png', 'svg'], dpi=None, n_bins=45, encoded=False, n_workers=None):
+    """
+    USAGE:
+    written_files = export_histograms_colored_by_quartile(exploded_telos_df, astro_ids, 'figures', n_workers=4)
+    
+    Batch version of make_histograms_colored_by_quartile_for_astronauts (or the encoded version w/ encoded=True): 
+    renders each astronaut's figure (see render_astronaut_quartile_histograms) & saves it to output_dir in every 
+    format, as 'dso{astro id} histogram of individual telomere length distributions.{format}'. dpi is one value 
+    or {format: dpi}; defaults to 600 for png & 1500 for svg as before. exploded_telos_df can also be a 
+    ragged_telomere_store, i.e from open_telomere_memmap. Figures are rendered on matplotlib's non-interactive 
+    Agg backend; with n_workers > 1 astronauts are rendered in a pool of processes. Astronauts not in the data 
+    are skipped. Returns the list of written files.
+    """
+    
+    if dpi is None:
+        dpi = {'png': 600, 'svg': 1500}
+    if not isinstance(dpi, dict):
+        dpi = {fmt: dpi for fmt in formats}
+    os.makedirs(output_dir, exist_ok=True)
+    
+    telo_groups = exploded_telo_groups(exploded_telos_df, id_col='encoded astro id' if encoded else 'astro id')
+    astro_ids = [astro_id_num for astro_id_num in astro_ids if telo_groups.has_astronaut(astro_id_num)]
+    plot_groups = [telo_groups.astronaut(astro_id_num) for astro_id_num in astro_ids]
+    
+    exporter = partial(export_astronaut_quartile_histograms, n_bins=n_bins, encoded=encoded, 
+                       output_dir=output_dir, formats=formats, dpi=dpi)
+    
+    if n_workers is not None and n_workers > 1:
+        print(f'rendering {len(astro_ids)} astronauts w/ {n_workers} processes..')
+        with ProcessPoolExecutor(max_workers=n_workers, initializer=plt.switch_backend, initargs=('Agg',)) as executor:
+            written_files = list(executor.map(exporter, plot_groups, astro_ids))
+    else:
+        # same non-interactive backend as the workers, the caller's backend is restored afterwards
+        backend = plt.get_backend()
+        plt.switch_backend('Agg')
+        try:
+            written_files = [exporter(plot_group, astro_id_num) for plot_group, astro_id_num in zip(plot_groups, astro_ids)]
+        finally:
+            plt.switch_backend(backend)
+    
+    return [file_path for file_paths in written_files for file_path in file_paths]
+
+
+def export_astronaut_quartile_histograms(telo_groups, astro_id_num, n_bins=45, encoded=False, 
+                                         output_dir='.', formats=['png'], dpi=None):
+    # renders & saves one astronaut's figure in every format, closing it afterwards; returns the written paths
+    fig = render_astronaut_quartile_histograms(telo_groups, astro_id_num, n_bins, encoded=encoded)
+    if fig is None:
+        return []
+    
+    file_paths = []
+    for fmt in formats:
+        file_path = os.path.join(output_dir, f'dso{astro_id_num} histogram of individual telomere length distributions.{fmt}')
+        fig.savefig(file_path, format=fmt, dpi=(dpi or {}).get(fmt, 600), bbox_inches='tight' if encoded else None)
+        file_paths.append(file_path)
+        
+    plt.close(fig)
+    return file_paths
+    
+    
 def initialize_encoded_telo_data_timepoint_or_blank(timepoint, df):
     if timepoint in list(df['timepoint'].unique()):
         timepoint_telo_data = df[df['timepoint'] == str(timepoint)]['telo data exploded']
@@ -1105,47 +2360,11 @@ def initialize_encoded_telo_data_timepoint_or_blank(timepoint, df):
     
     
 def make_histograms_colored_by_quartile_for_encoded_astronauts(exploded_telos_df=None, astro_ids=None, n_bins=60, save=True):
-    grouped_data = exploded_telos_df.groupby('encoded astro id')
+    telo_groups = exploded_telo_groups(exploded_telos_df, id_col='encoded astro id')
     for astro_id_num in astro_ids:
-        if astro_id_num not in grouped_data.groups.keys():
+        if not telo_groups.has_astronaut(astro_id_num):
             break
-        plot_df = grouped_data.get_group(astro_id_num)
-
-        for timepoint in ['L-270', 'L-180']:
-            first_timepoint = initialize_telo_data_1st_timepoint_variable(timepoint=timepoint, df=plot_df)
-            if first_timepoint.size > 30:
-                break
-        quartile_ref = first_timepoint
-
-        name_L270, astro_L270 = initialize_encoded_telo_data_timepoint_or_blank('L-270', plot_df)
-        name_L180, astro_L180 = initialize_encoded_telo_data_timepoint_or_blank('L-180', plot_df)
-
-        if 'A' == astro_id_num or 'C' == astro_id_num:
-            name_Mid1, astro_Mid1 = initialize_encoded_telo_data_timepoint_or_blank('FD90', plot_df)
-            name_Mid2, astro_Mid2 = initialize_encoded_telo_data_timepoint_or_blank('FD140', plot_df)
-        if 'B' == astro_id_num:
-            name_Mid1, astro_Mid1 = initialize_encoded_telo_data_timepoint_or_blank('FD45', plot_df)
-            name_Mid2, astro_Mid2 = initialize_encoded_telo_data_timepoint_or_blank('FD260', plot_df)
-        name_R180, astro_R180 = initialize_encoded_telo_data_timepoint_or_blank('R+180', plot_df)
-        name_R270, astro_R270 = initialize_encoded_telo_data_timepoint_or_blank('R+270', plot_df)
-
-
-        if ('B' == astro_id_num) or ('A' == astro_id_num) or ('C' == astro_id_num):
-            n_bins = n_bins
-            if name_L270 != '': 
-                        if name_R270 != '':
-                            graph_four_histograms(quartile_ref, n_bins, astro_L270, astro_Mid1, astro_Mid2, astro_R270,
-                                                                    name_L270, name_Mid1, name_Mid2, name_R270)
-                        elif name_R270 == '':
-                            graph_four_histograms(quartile_ref, n_bins, astro_L270, astro_Mid1, astro_Mid2, astro_R180,
-                                                                    name_L270, name_Mid1, name_Mid2, name_R180)
-            elif name_L270 == '':
-                        if name_R270 != '':
-                            graph_four_histograms(quartile_ref, n_bins, astro_L180, astro_Mid1, astro_Mid2, astro_R270,
-                                                                    name_L180, name_Mid1, name_Mid2, name_R270)
-                        elif name_R270 == '':
-                            graph_four_histograms(quartile_ref, n_bins, astro_L180, astro_Mid1, astro_Mid2, astro_R180,
-                                                                    name_L180, name_Mid1, name_Mid2, name_R180)
+        render_astronaut_quartile_histograms(telo_groups, astro_id_num, n_bins, encoded=True)
         
         if save:
             plt.savefig(f'../MANUSCRIPT 2 ASTROS/figures/dso{astro_id_num} histogram of individual telomere length distributions.png',
@@ -1163,7 +2382,10 @@ def make_histograms_colored_by_quartile_for_encoded_astronauts(exploded_telos_df
 
 def select_astros_of_interest(analyte_df, telomere_df, astro_ids_of_interest, target):
     
-    if 'astro id' in telomere_df.columns:
+    # a telomere_sufficient_stats table is already tidy, only astronauts get selected
+    is_sufficient_stats = isinstance(telomere_df, telomere_sufficient_stats)
+    
+    if not is_sufficient_stats and 'astro id' in telomere_df.columns:
         telomere_df['astro id'] = telomere_df['astro id'].astype('str')
     if 'astro id' in analyte_df.columns:
         analyte_df['astro id'] = analyte_df['astro id'].astype('str')
@@ -1172,10 +2394,10 @@ def select_astros_of_interest(analyte_df, telomere_df, astro_ids_of_interest, ta
     
     # dropping unnecessary cols from telo df
     for col in ['astro number', 'timepoint']:
-        if col in telomere_df.columns:
+        if not is_sufficient_stats and col in telomere_df.columns:
             telomere_df.drop([col], axis=1, inplace=True)
             
-    trim_astro_df = telomere_df.copy()
+    trim_astro_df = telomere_df if is_sufficient_stats else telomere_df.copy()
     
     if 'all astros' in astro_ids_of_interest:
         
@@ -1194,7 +2416,10 @@ def select_astros_of_interest(analyte_df, telomere_df, astro_ids_of_interest, ta
 
     elif 'all astros' not in astro_ids_of_interest:
         # subset astro ids of interest 
-        selected_astros = trim_astro_df[trim_astro_df['astro id'].isin(astro_ids_of_interest)].reset_index(drop=True)
+        if is_sufficient_stats:
+            selected_astros = trim_astro_df.select(astro_ids_of_interest)
+        else:
+            selected_astros = trim_astro_df[trim_astro_df['astro id'].isin(astro_ids_of_interest)].reset_index(drop=True)
         id_values = ['astro id', 'flight status']
         
     return analyte_df, selected_astros, id_values
@@ -1203,7 +2428,12 @@ def select_astros_of_interest(analyte_df, telomere_df, astro_ids_of_interest, ta
 def merge_analyte_telomere_data(analyte_df, selected_astros, id_values, telos_percent_change, target):
     
     # take mean telomere length values of all astronauts or per astros of interest & merge with analytes 
-    mean_selected_astros = selected_astros.groupby(id_values).agg('mean').reset_index()
+    # (if selected_astros is a telomere_sufficient_stats, the mean of each group's per sample means from the 
+    # sums & counts, same as averaging the samples' 'telo means' but w/ each sample's measured telomeres)
+    if isinstance(selected_astros, telomere_sufficient_stats):
+        mean_selected_astros = selected_astros.means(id_values, name=target, per_sample=True)
+    else:
+        mean_selected_astros = selected_astros.groupby(id_values).agg('mean').reset_index()
     
     if telos_percent_change == 'yes':
         mean_selected_astros[target] = (mean_selected_astros[target]
@@ -1355,7 +2585,16 @@ def find_high_correlates_analytes_mean_telos(merged_analyte_blood_tidy_df, corr_
 def plot_diverging_correlations(list_correlates=None, target_name=None, figsize=(11,7), 
                                 dpi=600, color1='black', color2='green', fontsize=16,
                                 y_label_name='Blood biochemistry analytes', 
-                                path_labels='', save=True):
+                                path_labels='', save=True, figure_cache=False):
+    
+    file_path = f'../MANUSCRIPT 11 ASTROS/figures/11 astros diverging bars {y_label_name} {target_name} {path_labels} n=11.png'
+    if save and figure_cache:
+        cache_key = figure_cache_key('plot_diverging_correlations', {key: value for key, value in locals().items() 
+                                                                     if key not in ['save', 'figure_cache', 'file_path']})
+        if figure_is_cached(file_path, cache_key):
+            print(f'{file_path} unchanged, skipping..')
+            return
+    
     df = list_correlates.copy()
     x = df['correlation value']
     df['colors'] = [color2 if x < 0 else color1 for x in df['correlation value']]
@@ -1377,8 +2616,8 @@ def plot_diverging_correlations(list_correlates=None, target_name=None, figsize=
     plt.xticks(my_xticks[::1])
     
     if save:
-        plt.savefig(f'../MANUSCRIPT 11 ASTROS/figures/11 astros diverging bars {y_label_name} {target_name} {path_labels} n=11.png', 
-                    dpi=dpi, bbox_inches='tight')
+        plt.savefig(file_path, dpi=dpi, bbox_inches='tight')
+        save_figure_cache_key(file_path, cache_key if figure_cache else None)
         
         
 def analyze_biochem_analytes_target(df=None, target=None, melt_biochem_df=None, 
@@ -1436,6 +2675,13 @@ def scipy_anova_post_hoc_tests(df=None, flight_status_col='flight status', targe
         
 def telos_scipy_anova_post_hoc_tests(df0=None, time_col='flight status', target='individual telomeres',
                                      sig_test=stats.f_oneway, post_hoc=None, repeated_measures=False):
+    """
+    df0 can also be a telomere_sufficient_stats, in which case the one way ANOVA (sig_test is ignored), 
+    the repeated measures ANOVA on per astronaut means & Tukey HSD all come from the table
+    """
+    if isinstance(df0, telomere_sufficient_stats):
+        return telos_sufficient_stats_anova_post_hoc_tests(df0, time_col=time_col, repeated_measures=repeated_measures)
+    
     df = df0.copy()
     df.rename({'telo data per cell': 'telo_data_per_cell',
                'flight status': 'flight_status',
@@ -1456,24 +2702,133 @@ def telos_scipy_anova_post_hoc_tests(df0=None, time_col='flight status', target=
         print(f'ONE WAY ANOVA for telomere length: {p_value}')
               
     elif repeated_measures:
-        results = AnovaRM(df, target, 'astro_id', 
-                          within=[time_col], aggregate_func='mean').fit()
-        # pvalue
-        p_value = results.anova_table['Pr > F'][0]
+        # on per astronaut means (see batch_repeated_measures_anova), same as AnovaRM(aggregate_func='mean')
+        results = batch_repeated_measures_anova(df, value_col=target, subject_col='astro_id', within_col=time_col)
+        p_value = results['Pr > F'][0]
         print(f'REPEATED MEASURES ANOVA for telomere length: {p_value}')     
           
-    # if anova detects sig diff, perform post-hoc tests
+    # if anova detects sig diff, perform post-hoc tests (Tukey from per group n / sum / sum of squares)
+    tukey_df = None
     if p_value <= 0.05:
-        mc = MultiComparison(df[target], df[time_col])
-        mc_results = mc.tukeyhsd()
-        print(mc_results)
-        res = mc_results
-        print(f'TukeyHSD pvalues: {list(psturng(np.abs(res.meandiffs / res.std_pairs), len(res.groupsunique), res.df_total))}')
+        tukey_df = tukey_hsd_from_sufficient_stats(group_sufficient_stats(df, [time_col], target), time_col)
+        print(tukey_df)
+        print(f'TukeyHSD pvalues: {list(tukey_df["p value"])}')
         
 #         print('\nbonferroni pvalues')
 #         display(sp.posthoc_ttest(df, val_col=target, group_col=time_col, equal_var=False,
 #                                  p_adjust='bonferroni'))
+    
+    return tukey_df
+        
+
+def telos_sufficient_stats_anova_post_hoc_tests(telo_stats, time_col='flight status', repeated_measures=False):
+    # telos_scipy_anova_post_hoc_tests from a telomere_sufficient_stats, w/o touching individual telomeres
+    stats_df = telo_stats.aggregate([time_col])
+    
+    if repeated_measures == False:
+        p_value = anova_from_sufficient_stats(stats_df, by=None, flight_status_col=time_col)['p value'][0]
+        print(f'ONE WAY ANOVA for telomere length: {p_value}')
+        
+    elif repeated_measures:
+        p_value = batch_repeated_measures_anova(telo_stats, within_col=time_col)['Pr > F'][0]
+        print(f'REPEATED MEASURES ANOVA for telomere length: {p_value}')
+    
+    tukey_df = None
+    if p_value <= 0.05:
+        tukey_df = tukey_hsd_from_sufficient_stats(stats_df, time_col)
+        print(tukey_df)
+        print(f'TukeyHSD pvalues: {list(tukey_df["p value"])}')
+    
+    return tukey_df
+
+
+def repeated_measures_means(data=None, value_col=None, target_col=None, subject_col='astro id', 
+                            within_col='flight status'):
+    """
+    Tidy (target, subject_col, within_col, mean) table of the mean of each target per subject & level, w/ one 
+    groupby. data is a long dataframe (targets in target_col, e.g 'aberration type', or a single target named 
+    value_col if target_col is None; value_col can also be a list of columns, one target each), a 
+    telomere_sufficient_stats (target 'telo means', from its sums & counts), or a list of those.
+    """
+    
+    if isinstance(data, list):
+        return pd.concat([repeated_measures_means(item, value_col, target_col, subject_col, within_col) for item in data], 
+                         ignore_index=True, sort=False)
+    
+    if isinstance(data, telomere_sufficient_stats):
+        means = data.means([subject_col, within_col], name='mean')
+        means.insert(0, 'target', 'telo means')
+        return means
+    
+    if isinstance(value_col, list):
+        data = data.melt(id_vars=[subject_col, within_col], value_vars=value_col, var_name='target', value_name='value')
+        target_col, value_col = 'target', 'value'
+    
+    group_cols = [subject_col, within_col] if target_col is None else [target_col, subject_col, within_col]
+    means = data.groupby(group_cols, sort=False, observed=True)[value_col].mean().reset_index()
+    means = means.rename(columns={value_col: 'mean', target_col: 'target'})
+    if target_col is None:
+        means.insert(0, 'target', value_col)
+    return means[['target', subject_col, within_col, 'mean']]
+    
+    
+def batch_repeated_measures_anova(data=None, value_col=None, target_col=None, subject_col='astro id', 
+                                  within_col='flight status'):
+    """
+    USAGE:
+    rm_df = batch_repeated_measures_anova([telo_stats, melted_aberr_df], value_col='count per cell', 
+                                          target_col='aberration type')
+    
+    One way repeated measures ANOVA of subject_col across the levels of within_col for every target at once, 
+    on per subject means (see repeated_measures_means for what data can be), i.e AnovaRM(aggregate_func='mean') 
+    for each target. The means of all targets are laid out as one (targets, subjects, levels) array & the sums 
+    of squares are reduced over it in one pass. Subjects missing a level that target has are left out of that 
+    target (AnovaRM would refuse the unbalanced data) & reported.
+    
+    Returns a tidy dataframe: target, subjects, F Value, Num DF, Den DF, Pr > F.
+    """
+    
+    means = repeated_measures_means(data, value_col, target_col, subject_col, within_col)
+    
+    target_codes, targets = pd.factorize(means['target'])
+    subject_codes, subjects = pd.factorize(means[subject_col])
+    level_codes, levels = pd.factorize(means[within_col])
+    
+    values = np.full((len(targets), len(subjects), len(levels)), np.nan)
+    values[target_codes, subject_codes, level_codes] = means['mean'].to_numpy(dtype='float64')
+    measured = ~np.isnan(values)
+    
+    # levels each target has, & the subjects measured at all of them
+    present = measured.any(axis=1)
+    complete = (measured | ~present[:, None, :]).all(axis=2) & measured.any(axis=2)
+    cells = complete[:, :, None] & present[:, None, :]
+    
+    k = present.sum(axis=1)
+    n = complete.sum(axis=1)
+    filled = np.where(cells, values, 0)
+    
+    with np.errstate(invalid='ignore', divide='ignore'):
+        grand_mean = filled.sum(axis=(1, 2)) / (n * k)
+        level_means = filled.sum(axis=1) / n[:, None]
+        subject_means = filled.sum(axis=2) / k[:, None]
+        
+        deviations = np.where(cells, values - grand_mean[:, None, None], 0)
+        ss_total = (deviations ** 2).sum(axis=(1, 2))
+        ss_levels = n * np.where(present, (level_means - grand_mean[:, None]) ** 2, 0).sum(axis=1)
+        ss_subjects = k * np.where(complete, (subject_means - grand_mean[:, None]) ** 2, 0).sum(axis=1)
+        ss_error = ss_total - ss_levels - ss_subjects
         
+        num_df = k - 1
+        den_df = (k - 1) * (n - 1)
+        f_value = (ss_levels / num_df) / (ss_error / den_df)
+    
+    for t in np.flatnonzero((complete != measured.any(axis=2)).any(axis=1)):
+        dropped = list(subjects[measured[t].any(axis=1) & ~complete[t]])
+        print(f'{targets[t]}: {subject_col} {dropped} not measured at every {within_col}, left out')
+    
+    return pd.DataFrame({'target': targets, 'subjects': n, 'F Value': f_value, 'Num DF': num_df.astype('float64'), 
+                         'Den DF': den_df.astype('float64'), 'Pr > F': stats.f.sf(f_value, num_df, den_df)})
+
 
 def id_encode_letters(row):
     if row == '1536':
@@ -1485,27 +2840,267 @@ def id_encode_letters(row):
 
 def eval_make_test_comparisons(df=None, timepoints=None, test=None, test_name=None, 
                                target='individual telos'):
-              
+    # prints & returns test between every pair of timepoints in df; see pairwise_timepoint_tests for a table
     timepoints = list(df['timepoint'].unique())
+    timepoint_values = {timept: df[df['timepoint'] == timept][target] for timept in timepoints}
+    
     timept_pairs = []
     row = []
-    df_list = []
-              
-    for timept in timepoints:
-        df_list.append(df[df['timepoint'] == timept][target])
-              
-    for iter1, df in zip(timepoints, df_list):
-        for iter2, i in zip(timepoints, range(len(df_list))):
-            pair1, pair2 = f"{iter1}:{iter2}", f"{iter2}:{iter1}"
-            if iter1 != iter2 and pair1 not in timept_pairs and pair2 not in timept_pairs:
-                stat, pvalue = test(df, df_list[i])
-                print(f'{test_name} | {iter1} vs {iter2} {pvalue}')
-                timept_pairs.append(pair1)
-                timept_pairs.append(pair2)
-                row.append([test_name, iter1, iter2, pvalue])
+    for iter1, iter2 in itertools.combinations(timepoints, 2):
+        stat, pvalue = test(timepoint_values[iter1], timepoint_values[iter2])
+        print(f'{test_name} | {iter1} vs {iter2} {pvalue}')
+        timept_pairs.extend([f"{iter1}:{iter2}", f"{iter2}:{iter1}"])
+        row.append([test_name, iter1, iter2, pvalue])
     return timept_pairs, row
 
 
+# scipy 1.2's mannwhitneyu defaults to a one-sided p value, KS & t-test are two-sided
+PAIRWISE_TESTS = {'Mann-Whitney': partial(stats.mannwhitneyu, alternative='two-sided'),
+                  'KS': ks_2samp,
+                  't-test': stats.ttest_ind}
+
+
+def pairwise_timepoint_tests(df=None, tests=['Mann-Whitney', 'KS', 't-test'], target='individual telos', 
+                             group_col='astro id', timepoint_col='timepoint', p_adjust='fdr_bh', alpha=0.05, 
+                             n_workers=None):
+    """
+    USAGE:
+    pairwise_df = pairwise_timepoint_tests(exploded_telos_df, target='telo data exploded', n_workers=4)
+    pairwise_df = pairwise_timepoint_tests(exploded_telos_df, tests={'Welch': partial(stats.ttest_ind, equal_var=False)})
+    
+    Runs every test between every pair of timepoints within each group_col group (e.g each astronaut; 
+    group_col=None tests the whole df as one group). tests are names in PAIRWISE_TESTS or a {name: test} 
+    dictionary of module level functions taking two samples & returning (statistic, p value). Timepoint pairs 
+    are enumerated once per group w/ itertools.combinations, in TIMEPOINT_ORDER for categorical timepoints; 
+    w/ n_workers > 1 groups are tested in a process pool.
+    
+    p values are adjusted w/ statsmodels' multipletests(method=p_adjust) within each group & test. 
+    Returns a tidy dataframe: group_col, test, timepoint 1, timepoint 2, n 1, n 2, statistic, p value, 
+    adjusted p value, significant (adjusted p value <= alpha).
+    """
+    
+    if not isinstance(tests, dict):
+        tests = {test_name: PAIRWISE_TESTS[test_name] for test_name in tests}
+    
+    values = df[target].to_numpy(dtype='float64')
+    group_names, group_positions = timepoint_positions_by_group(df, target, group_col=group_col, timepoint_col=timepoint_col)
+    group_values = [{timept: values[positions] for timept, positions in timepoint_positions.items()} 
+                    for timepoint_positions in group_positions]
+    
+    tester = partial(pairwise_tests_for_group, tests=tests)
+    
+    if n_workers is not None and n_workers > 1:
+        print(f'testing {len(group_names)} groups w/ {n_workers} processes..')
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            results = list(executor.map(tester, group_names, group_values))
+    else:
+        results = [tester(group, timepoint_values) for group, timepoint_values in zip(group_names, group_values)]
+    
+    pairwise_df = pd.DataFrame([row for rows in results for row in rows], 
+                               columns=[group_col or 'group', 'test', 'timepoint 1', 'timepoint 2', 
+                                        'n 1', 'n 2', 'statistic', 'p value'])
+    if group_col is None:
+        pairwise_df.drop('group', axis=1, inplace=True)
+    
+    # adjusted w/in each family of (group, test); NaN p values (i.e empty samples) are left out
+    pairwise_df['adjusted p value'] = np.nan
+    family_cols = ['test'] if group_col is None else [group_col, 'test']
+    for family, family_df in pairwise_df.groupby(family_cols, sort=False):
+        tested = family_df['p value'].notna()
+        if tested.any():
+            pairwise_df.loc[family_df.index[tested], 'adjusted p value'] = multipletests(family_df['p value'][tested], 
+                                                                                         method=p_adjust)[1]
+    pairwise_df['significant'] = pairwise_df['adjusted p value'] <= alpha
+    return pairwise_df
+
+
+def timepoint_positions_by_group(df, target, group_col='astro id', timepoint_col='timepoint'):
+    """
+    Splits df by group_col (one group if None) & timepoint: returns (group names, [{timepoint: positions of 
+    the group's rows at that timepoint w/ a target value}]). Timepoints are in TIMEPOINT_ORDER for categorical 
+    timepoints, otherwise in order of appearance.
+    """
+    
+    measured = df[target].notna().to_numpy()
+    timepoint_labels = df[timepoint_col].to_numpy()
+    if group_col is None:
+        group_labels, group_names = np.zeros(len(df), dtype='int64'), [None]
+    else:
+        group_labels, group_names = pd.factorize(df[group_col])
+        group_names = list(group_names)
+    
+    if pd.api.types.is_categorical_dtype(df[timepoint_col]):
+        timepoint_order = list(df[timepoint_col].cat.categories)
+    else:
+        timepoint_order = list(df[timepoint_col].dropna().unique())
+    
+    group_positions = []
+    for g in range(len(group_names)):
+        in_group = (group_labels == g) & measured
+        present = set(timepoint_labels[in_group])
+        group_positions.append({timept: np.flatnonzero(in_group & (timepoint_labels == timept)) 
+                                for timept in timepoint_order if timept in present})
+    return group_names, group_positions
+
+
+def pairwise_tests_for_group(group, timepoint_values, tests):
+    # rows of pairwise_timepoint_tests for one group, timepoint_values is {timepoint: values} in order
+    rows = []
+    for test_name, test in tests.items():
+        for timept1, timept2 in itertools.combinations(timepoint_values.keys(), 2):
+            values1, values2 = timepoint_values[timept1], timepoint_values[timept2]
+            if len(values1) and len(values2):
+                statistic, p_value = test(values1, values2)
+            else:
+                statistic, p_value = np.nan, np.nan
+            rows.append([group, test_name, timept1, timept2, len(values1), len(values2), statistic, p_value])
+    return rows
+
+
+def permutation_timepoint_tests(df=None, target='individual telos', group_col='astro id', timepoint_col='timepoint', 
+                                pairs=None, n_permutations=5000, quantiles=[0.25, 0.75], cell_col=None, seed=0, 
+                                chunk_size=None, n_workers=None):
+    """
+    USAGE:
+    perm_df = permutation_timepoint_tests(exploded_telos_df, target='telo data exploded', n_workers=8)
+    perm_df = permutation_timepoint_tests(cells_df, pairs=[('L-270', 'R+7')], cell_col='cell')
+    
+    Permutation tests between pairs of timepoints w/in each group_col group (each astronaut; None for the 
+    whole df) for the difference (timepoint 2 - timepoint 1) in mean, median & fraction of telomeres in each 
+    band between the quantiles of timepoint 1 (Q1 / Q2-3 / Q4 by default). pairs defaults to every pair of 
+    timepoints (see timepoint_positions_by_group for the order). 
+    
+    Permutations are generated as (permutations, telomeres) membership matrices in chunks of chunk_size & the 
+    statistics are evaluated for a whole chunk at once (see permutation_test_pair). W/ cell_col, whole cells 
+    (labelled by cell_col, unique w/in a group & timepoint) are permuted between the timepoints instead of 
+    single telomeres, which keeps telomeres of one cell together. Each comparison draws from its own 
+    np.random.Generator seeded by (seed, crc32 of 'group timepoint 1 timepoint 2') & w/ n_workers > 1 
+    comparisons run in a process pool.
+    
+    Returns a tidy dataframe: group_col, timepoint 1, timepoint 2, n 1, n 2, statistic, observed, p value 
+    (two sided, (# permutations at least as extreme + 1) / (n_permutations + 1)), n permutations.
+    """
+    
+    values = df[target].to_numpy(dtype='float64')
+    cells = None if cell_col is None else pd.factorize(df[cell_col])[0]
+    group_names, group_positions = timepoint_positions_by_group(df, target, group_col=group_col, timepoint_col=timepoint_col)
+    
+    edges = sorted(quantiles)
+    if edges == [0.25, 0.75]:
+        band_names = ['Q1', 'Q2-3', 'Q4']
+    else:
+        edge_names = ['q0'] + [f'q{edge:g}' for edge in edges] + ['q1']
+        band_names = [f'{edge_names[b]}-{edge_names[b + 1]}' for b in range(len(edges) + 1)]
+    
+    comparisons = []
+    for group, timepoint_positions in zip(group_names, group_positions):
+        group_pairs = itertools.combinations(timepoint_positions.keys(), 2) if pairs is None else pairs
+        for timept1, timept2 in group_pairs:
+            if timept1 in timepoint_positions and timept2 in timepoint_positions:
+                comparisons.append((group, timept1, timept2, 
+                                    timepoint_positions[timept1], timepoint_positions[timept2]))
+    
+    values1 = [values[positions1] for group, timept1, timept2, positions1, positions2 in comparisons]
+    values2 = [values[positions2] for group, timept1, timept2, positions1, positions2 in comparisons]
+    cells1 = [None if cells is None else cells[positions1] for group, timept1, timept2, positions1, positions2 in comparisons]
+    cells2 = [None if cells is None else cells[positions2] for group, timept1, timept2, positions1, positions2 in comparisons]
+    comparison_keys = [f'{group} {timept1} {timept2}' for group, timept1, timept2, positions1, positions2 in comparisons]
+    
+    tester = partial(permutation_test_pair, n_permutations=n_permutations, quantiles=edges, seed=seed, chunk_size=chunk_size)
+    
+    if n_workers is not None and n_workers > 1:
+        print(f'permuting {len(comparisons)} comparisons w/ {n_workers} processes..')
+        with ProcessPoolExecutor(max_workers=n_workers) as executor:
+            results = list(executor.map(tester, values1, values2, cells1, cells2, comparison_keys))
+    else:
+        results = [tester(*args) for args in zip(values1, values2, cells1, cells2, comparison_keys)]
+    
+    statistic_names = ['mean difference', 'median difference'] + [f'{band} fraction difference' for band in band_names]
+    rows = []
+    for (group, timept1, timept2, positions1, positions2), (observed, p_values) in zip(comparisons, results):
+        for statistic, obs, p_value in zip(statistic_names, observed, p_values):
+            rows.append([group, timept1, timept2, len(positions1), len(positions2), statistic, obs, p_value, n_permutations])
+    
+    perm_df = pd.DataFrame(rows, columns=[group_col or 'group', 'timepoint 1', 'timepoint 2', 'n 1', 'n 2', 
+                                          'statistic', 'observed', 'p value', 'n permutations'])
+    if group_col is None:
+        perm_df.drop('group', axis=1, inplace=True)
+    return perm_df
+
+
+def permutation_test_pair(values1, values2, cells1=None, cells2=None, comparison_key='', n_permutations=5000, 
+                          quantiles=[0.25, 0.75], seed=0, chunk_size=None):
+    """
+    One comparison of permutation_timepoint_tests: returns (observed statistics, p values) for the mean 
+    difference, median difference & band fraction differences of values2 - values1. 
+    
+    The pooled values are sorted once, so each permutation is just a boolean membership row over the sorted 
+    pool: group sums & band counts are matrix products w/ the membership matrix, & group medians are read off 
+    the running count of members along the sorted pool. Each permutation gives timepoint 1 the telomeres w/ the 
+    smallest random keys, or w/ cells1 / cells2 shuffles the cells' labels & spreads them to their telomeres.
+    """
+    
+    values1 = np.asarray(values1, dtype='float64')
+    values2 = np.asarray(values2, dtype='float64')
+    n_statistics = 2 + len(quantiles) + 1
+    if len(values1) == 0 or len(values2) == 0:
+        return np.full(n_statistics, np.nan), np.full(n_statistics, np.nan)
+    
+    pooled = np.concatenate([values1, values2])
+    in_first = np.concatenate([np.ones(len(values1), dtype=bool), np.zeros(len(values2), dtype=bool)])
+    order = np.argsort(pooled, kind='mergesort')
+    pooled, in_first = pooled[order], in_first[order]
+    
+    # bands between timepoint 1's quantiles, same edge rules as count_telos_in_bands
+    cutoffs = np.quantile(values1, quantiles)
+    bands = telo_bands(pooled, [len(pooled)], cutoffs.reshape(1, -1))
+    band_onehot = (bands[:, None] == np.arange(len(quantiles) + 1)).astype('float64')
+    
+    if cells1 is not None:
+        # cells of the 2 timepoints get distinct labels, then each telomere points at its cell
+        cell_labels = np.concatenate([np.asarray(cells1) * 2, np.asarray(cells2) * 2 + 1])[order]
+        cell_labels, telo_cell = np.unique(cell_labels, return_inverse=True)
+        cell_in_first = cell_labels % 2 == 0
+    
+    def statistics(members):
+        # members: (rows, len(pooled)) bool of which sorted telomeres are in timepoint 1
+        n1 = members.sum(axis=1)
+        n2 = len(pooled) - n1
+        sum1 = members @ pooled
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean_diff = (pooled.sum() - sum1) / n2 - sum1 / n1
+            band_diff = (band_onehot.sum(axis=0) - members @ band_onehot) / n2[:, None] - (members @ band_onehot) / n1[:, None]
+        
+        # running count of timepoint 1 members along the sorted pool, timepoint 2's is the rest
+        running1 = np.cumsum(members, axis=1, dtype='int32')
+        medians = []
+        for running, n in [(running1, n1), (np.arange(1, len(pooled) + 1, dtype='int32') - running1, n2)]:
+            lower = np.argmax(running >= ((n + 1) // 2)[:, None], axis=1)
+            upper = np.argmax(running >= (n // 2 + 1)[:, None], axis=1)
+            medians.append(np.where(n > 0, (pooled[lower] + pooled[upper]) / 2, np.nan))
+        return np.column_stack([mean_diff, medians[1] - medians[0], band_diff])
+    
+    observed = statistics(in_first.reshape(1, -1))[0]
+    
+    rng = np.random.default_rng([seed, zlib.crc32(str(comparison_key).encode('utf-8'))])
+    if chunk_size is None:
+        chunk_size = max(1, 2**22 // len(pooled))
+    
+    n_extreme = np.zeros(n_statistics, dtype='int64')
+    tolerance = 1e-12 * np.maximum(np.abs(observed), 1)
+    for start in range(0, n_permutations, chunk_size):
+        n_rows = min(chunk_size, n_permutations - start)
+        if cells1 is None:
+            # timepoint 1 gets the telomeres w/ the len(values1) smallest random keys
+            keys = rng.random((n_rows, len(pooled)))
+            members = keys <= np.partition(keys, len(values1) - 1, axis=1)[:, len(values1) - 1:len(values1)]
+        else:
+            members = cell_in_first[rng.random((n_rows, len(cell_labels))).argsort(axis=1)][:, telo_cell]
+        n_extreme += (np.abs(statistics(members)) >= np.abs(observed) - tolerance).sum(axis=0)
+    
+    return observed, (n_extreme + 1) / (n_permutations + 1)
+
+
 def make_post_flight_df_and_merge(astro_df=None, exploded_telos=None, timepoint=None):
     """
     parse out mean telomere length & #s short/long telomeres from specific post-flight (R+7, R+60, ... R+270) timepoints
@@ -1773,7 +3368,17 @@ def graph_cluster_groups(df, time=None, target=None, hue=None, colors='Set1',
                          n_cols=3, y_label_name=None, figsize=(7,3.2),
                          fontsize=14, save=True, bbox_to_anchor=(0.5, 1.21),
                          y_lim=None, path_labels='11 astros',
-                         markersize=13, markerscale=2, handlelength=1.22):
+                         markersize=13, markerscale=2, handlelength=1.22, figure_cache=False):
+    
+    file_path = f'../MANUSCRIPT 11 ASTROS/figures/{path_labels} lineplot {target} clustering.png'
+    if save and figure_cache:
+        # only the plotted columns go into the key, so changes to other targets don't force a redraw
+        cache_key = figure_cache_key('graph_cluster_groups', {**{key: value for key, value in locals().items() 
+                                                                 if key not in ['save', 'figure_cache', 'file_path']},
+                                                              'df': df[[col for col in [time, target, hue] if col is not None]]})
+        if figure_is_cached(file_path, cache_key):
+            print(f'{file_path} unchanged, skipping..')
+            return
     
     colors = sns.color_palette(colors)
     
@@ -1799,8 +3404,8 @@ def graph_cluster_groups(df, time=None, target=None, hue=None, colors='Set1',
     plt.legend(loc='upper center', bbox_to_anchor=bbox_to_anchor, handlelength=handlelength,
           ncol=n_cols, fancybox=True, fontsize=fontsize, markerscale=markerscale)
     if save:
-        plt.savefig(f'../MANUSCRIPT 11 ASTROS/figures/{path_labels} lineplot {target} clustering.png', 
-                dpi=600, bbox_inches = "tight")
+        plt.savefig(file_path, dpi=600, bbox_inches = "tight")
+        save_figure_cache_key(file_path, cache_key if figure_cache else None)
 
 
 def convert_mid_timepoint(row):
@@ -1852,7 +3457,15 @@ def rename_imputed_df(imputed_df=None, original_df=None):
 def clustermap_plot(df=None, method='single', metric='correlation', 
                     color_map='PRGn', col_cluster=False, fontsize=14, z_score=0,
                     y_label='Mean Telomere Length (Telo-FISH)', path_labels='11 astros',
-                    save=True):
+                    save=True, figure_cache=False):
+    
+    file_path = f'../MANUSCRIPT 11 ASTROS/figures/{path_labels} {y_label} cluster map.png'
+    if save and figure_cache:
+        cache_key = figure_cache_key('clustermap_plot', {key: value for key, value in locals().items() 
+                                                         if key not in ['save', 'figure_cache', 'file_path']})
+        if figure_is_cached(file_path, cache_key):
+            print(f'{file_path} unchanged, skipping..')
+            return
 
     g = sns.clustermap(df, method=method, metric=metric, z_score=z_score, figsize=(7,7), 
                        cmap=color_map, col_cluster=col_cluster) 
@@ -1879,7 +3492,8 @@ def clustermap_plot(df=None, method='single', metric='correlation',
         a.set_linewidth(1)
     
     if save:
-        plt.savefig(f'../MANUSCRIPT 11 ASTROS/figures/{path_labels} {y_label} cluster map.png', dpi=600, bbox_inches = "tight")
+        plt.savefig(file_path, dpi=600, bbox_inches = "tight")
+        save_figure_cache_key(file_path, cache_key if figure_cache else None)
         
         
 def flight_status(row):
@@ -2008,13 +3622,26 @@ def combine_midflight(row):
 
 def scipy_anova_post_hoc_tests(df=None, flight_status_col='flight status new',
                                sig_test=stats.f_oneway, post_hoc=sp.posthoc_ttest,
-                               equal_var=False, pool_sd=False, repeated_measures=False):
+                               equal_var=False, pool_sd=False, repeated_measures=False, 
+                               batch=False, target='count per cell', alpha=0.05):
     """
     df should be melted by aberration type
+    
+    batch=True skips the per aberration loop & printing & returns (anova_df, tukey_df) from
+    batch_anova_post_hoc_tests instead (one way ANOVA w/ Tukey HSD only, sig_test & post_hoc aren't used)
     """
+    if batch:
+        return batch_anova_post_hoc_tests(df, by='aberration type', flight_status_col=flight_status_col, 
+                                          target=target, alpha=alpha)
+    
     # make list of aberrations
     aberrations = list(df['aberration type'].unique())
     
+    # repeated measures ANOVAs for every aberration at once, on per astronaut means
+    if repeated_measures:
+        rm_df = batch_repeated_measures_anova(df, value_col='count per cell', target_col='aberration type', 
+                                              within_col=flight_status_col).set_index('target')
+    
     # loop through aberrations & perform anovas between pre/mid/post
     for aberr in aberrations:
     
@@ -2026,10 +3653,7 @@ def scipy_anova_post_hoc_tests(df=None, flight_status_col='flight status new',
             print(aberr, p_value)
 
         elif repeated_measures:
-            results = AnovaRM(df[df['aberration type'] == aberr].copy(), 'count per cell', 'astro id', 
-                              within=[flight_status_col], aggregate_func='mean').fit()
-            # pvalue
-            p_value = results.anova_table['Pr > F'][0]
+            p_value = rm_df.loc[aberr, 'Pr > F']
 
 
         # if anova detects sig diff, perform post-hoc tests
@@ -2040,6 +3664,142 @@ def scipy_anova_post_hoc_tests(df=None, flight_status_col='flight status new',
             print('\n')
             
             
+# group_sufficient_stats through tukey_hsd_from_sufficient_stats are also in chr_aberr_helper_fxns.py, keep both copies the same
+def group_sufficient_stats(df=None, group_cols=['aberration type', 'flight status new'], target='count per cell'):
+    """
+    n, sum & sum of squares of target per group, from one groupby over df (or summed from a table that isn't a 
+    dataframe but has an aggregate(group_cols) method, i.e telomere_methods_astros.telomere_sufficient_stats)
+    """
+    if not isinstance(df, pd.DataFrame):
+        return df.aggregate(group_cols)
+    
+    values = df[target].astype('float64')
+    grouped = pd.DataFrame({'value': values, 'value squared': values ** 2})
+    for col in group_cols:
+        grouped[col] = df[col]
+    grouped = grouped.dropna(subset=['value']).groupby(group_cols, sort=False, observed=True)
+    
+    stats_df = pd.concat([grouped['value'].count(), grouped['value'].sum(), grouped['value squared'].sum()], axis=1)
+    stats_df.columns = ['n', 'sum', 'sum of squares']
+    return stats_df.reset_index()
+
+
+def anova_from_sufficient_stats(stats_df=None, by='aberration type', flight_status_col='flight status new',
+                                levels=['Pre-Flight', 'Mid-Flight', 'Post-Flight']):
+    """
+    one way ANOVA between the levels of flight_status_col for every group of by (the whole table if None), w/ 
+    sums of squares computed from the group_sufficient_stats table in one vectorized pass (same F & p value 
+    as stats.f_oneway)
+    """
+    if not isinstance(stats_df, pd.DataFrame):
+        stats_df = group_sufficient_stats(stats_df, [flight_status_col] if by is None else [by, flight_status_col])
+    stats_df = stats_df[stats_df['n'] > 0]
+    if levels is not None:
+        stats_df = stats_df[stats_df[flight_status_col].isin(levels)]
+    
+    stats_df = stats_df.assign(**{'sum sq over n': stats_df['sum'] ** 2 / stats_df['n']})
+    totals = stats_df.groupby(np.zeros(len(stats_df)) if by is None else by, sort=False, observed=True)
+    totals = totals.agg({flight_status_col: 'count', 'n': 'sum', 'sum': 'sum', 'sum of squares': 'sum', 'sum sq over n': 'sum'})
+    
+    n_groups, n_total = totals[flight_status_col], totals['n']
+    ss_between = totals['sum sq over n'] - totals['sum'] ** 2 / n_total
+    ss_within = totals['sum of squares'] - totals['sum sq over n']
+    df_between, df_within = n_groups - 1, n_total - n_groups
+    
+    with np.errstate(invalid='ignore', divide='ignore'):
+        f_stat = (ss_between / df_between) / (ss_within / df_within)
+    
+    anova_df = pd.DataFrame({'groups': n_groups, 'n': n_total, 'df between': df_between, 'df within': df_within,
+                             'F statistic': f_stat, 'p value': stats.f.sf(f_stat, df_between, df_within)})
+    if by is None:
+        return anova_df.reset_index(drop=True)
+    return anova_df.reset_index()
+
+
+def batch_anova_post_hoc_tests(df=None, by='aberration type', flight_status_col='flight status new', 
+                               target='count per cell', alpha=0.05):
+    """
+    one way ANOVA between Pre/Mid/Post-Flight for every group of by (e.g every aberration type; None for the 
+    whole df) at once (see anova_from_sufficient_stats), then Tukey HSD for the groups w/ p value <= alpha
+    
+    returns (anova_df, tukey_df); tukey_df has one row per pair of flight statuses of each significant group
+    """
+    group_cols = [flight_status_col] if by is None else [by, flight_status_col]
+    stats_df = group_sufficient_stats(df, group_cols, target)
+    anova_df = anova_from_sufficient_stats(stats_df, by, flight_status_col)
+    
+    # post hoc from the same table, only for the significant groups
+    significant = anova_df['p value'] <= alpha
+    if by is None:
+        stats_df = stats_df if significant.any() else stats_df.iloc[:0]
+    else:
+        stats_df = stats_df[stats_df[by].isin(anova_df[significant][by])]
+    
+    tukey_df = tukey_hsd_from_sufficient_stats(stats_df, flight_status_col, by=by, alpha=alpha)
+    return anova_df, tukey_df
+
+
+@lru_cache(maxsize=None)
+def studentized_range_critical_value(n_groups, df_within, alpha=0.05):
+    # statsmodels' own critical value for tukeyhsd (qsturng or scipy's studentized_range depending on the version), 
+    # slow to compute & the same (groups, df) repeat across families, so critical values are cached
+    return get_tukeyQcrit2(n_groups, df_within, alpha=alpha)
+
+
+def tukey_hsd_from_sufficient_stats(stats_df=None, group_col='flight status new', by=None, alpha=0.05):
+    """
+    Tukey HSD between the groups of group_col w/in each group of by (the whole table if None), from a 
+    group_sufficient_stats table instead of the raw values: same mean diffs, critical value, intervals & reject 
+    as MultiComparison(...).tukeyhsd(). p values of every pair of every family come from one psturng call & are 
+    an approximation: psturng bounds them between 0.001 & 0.9 (so p < 0.001 is reported as 0.001), which can 
+    differ from the p-adj of newer statsmodels versions; use reject / the intervals for the decision at alpha
+    
+    returns one row per pair: by, group 1, group 2, mean diff, p value, lower, upper, reject
+    """
+    if not isinstance(stats_df, pd.DataFrame):
+        stats_df = group_sufficient_stats(stats_df, [group_col] if by is None else [by, group_col])
+    stats_df = stats_df[stats_df['n'] > 0]
+    families = [(None, stats_df)] if by is None else stats_df.groupby(by, sort=False, observed=True)
+    
+    tukey_rows = []
+    for family, family_df in families:
+        family_df = family_df.sort_values(group_col)
+        n = family_df['n'].to_numpy(dtype='float64')
+        sums = family_df['sum'].to_numpy(dtype='float64')
+        df_within = int(n.sum()) - len(n)
+        if len(n) < 2 or df_within < 1:
+            continue
+        
+        means = sums / n
+        mse = (family_df['sum of squares'].to_numpy(dtype='float64') - sums * means).sum() / df_within
+        
+        # pairs in the same order as statsmodels
+        i, j = np.triu_indices(len(n), 1)
+        meandiffs = means[j] - means[i]
+        std_pairs = np.sqrt(mse / 2 * (1 / n[i] + 1 / n[j]))
+        half_width = studentized_range_critical_value(len(n), df_within, alpha) * std_pairs
+        
+        groups = family_df[group_col].to_numpy()
+        for pair in range(len(i)):
+            tukey_rows.append([family, groups[i[pair]], groups[j[pair]], meandiffs[pair], 
+                               np.abs(meandiffs[pair] / std_pairs[pair]), len(n), df_within,
+                               meandiffs[pair] - half_width[pair], meandiffs[pair] + half_width[pair], 
+                               np.abs(meandiffs[pair]) > half_width[pair]])
+    
+    tukey_df = pd.DataFrame(tukey_rows, columns=[by or 'group', 'group 1', 'group 2', 'mean diff', 'q', 'groups', 
+                                                 'df within', 'lower', 'upper', 'reject'])
+    if len(tukey_df):
+        tukey_df['p value'] = np.atleast_1d(psturng(tukey_df['q'].to_numpy(), tukey_df['groups'].to_numpy(), 
+                                                    tukey_df['df within'].to_numpy()))
+    else:
+        tukey_df['p value'] = []
+    
+    tukey_df = tukey_df[[by or 'group', 'group 1', 'group 2', 'mean diff', 'p value', 'lower', 'upper', 'reject']]
+    if by is None:
+        tukey_df = tukey_df.drop('group', axis=1)
+    return tukey_df
+
+
 def rename_aberr(row):
     if row == 'sister chromatid exchanges':
         return 'classic SCEs'
@@ -2159,7 +3919,15 @@ def pull_merge_all_data(merge_what_data=None, how_groupby_telo_data=None, what_f
     return df_merged
 
 
-def graph_two_histograms_grp(quartile_ref, n_bins, df1, df2, name1, name2, path_labels=None, save=True):
+def graph_two_histograms_grp(quartile_ref, n_bins, df1, df2, name1, name2, path_labels=None, save=True, figure_cache=False):
+    
+    file_path = f'../MANUSCRIPT 11 ASTROS/figures/clustered group {path_labels} telo histograms.png'
+    if save and figure_cache:
+        cache_key = figure_cache_key('graph_two_histograms_grp', {key: value for key, value in locals().items() 
+                                                                  if key not in ['save', 'figure_cache', 'file_path']})
+        if figure_is_cached(file_path, cache_key):
+            print(f'{file_path} unchanged, skipping..')
+            return
     
     n_bins = n_bins
     fig, axs = plt.subplots(2, sharey=True, constrained_layout=True, figsize = (5, 6.4))
@@ -2176,8 +3944,8 @@ def graph_two_histograms_grp(quartile_ref, n_bins, df1, df2, name1, name2, path_
     astronaut_histogram_stylizer_divyBins_byQuartile_2Stacked(fig, axs, n_bins, df2, quartile_ref, name2, 1)
     
     if save:
-        plt.savefig(f'../MANUSCRIPT 11 ASTROS/figures/clustered group {path_labels} telo histograms.png',
-                   dpi=600, bbox_inches='tight')
+        plt.savefig(file_path, dpi=600, bbox_inches='tight')
+        save_figure_cache_key(file_path, cache_key if figure_cache else None)
         
         
 def graph_biochem_analyte_data(plot_left_y=None, plot_right_y=None, time=None, df=None, fsize=(8, 3.6),
@@ -2187,7 +3955,18 @@ def graph_biochem_analyte_data(plot_left_y=None, plot_right_y=None, time=None, d
                                bbox_to_anchor=(0.5, 1.17),
                                markersize=13, markerscale=2,
                                handlelength=1,
-                               save=True):
+                               save=True, figure_cache=False):
+    
+    if save:
+        file_path = f'../MANUSCRIPT 11 ASTROS/figures/11 astros {plot_left_y} vs {plot_right_y.replace("/", "_")} corr.png'
+        if figure_cache:
+            # only the two plotted analytes go into the key, so changes to other analytes don't force a redraw
+            cache_key = figure_cache_key('graph_biochem_analyte_data', {**{key: value for key, value in locals().items()
+                                                                           if key not in ['save', 'figure_cache', 'file_path']},
+                                                                        'df': df[[time, plot_left_y, plot_right_y]]})
+            if figure_is_cached(file_path, cache_key):
+                print(f'{file_path} unchanged, skipping..')
+                return
     
     plt.figure(figsize=fsize)
     ax = sns.lineplot(x=time, y=plot_left_y, data=df, color=ax_color1, 
@@ -2241,9 +4020,8 @@ def graph_biochem_analyte_data(plot_left_y=None, plot_right_y=None, time=None, d
     ax.add_artist(text)
     
     if save:
-        plot_right_y = plot_right_y.replace('/', '_')
-        plt.savefig(f'../MANUSCRIPT 11 ASTROS/figures/11 astros {plot_left_y} vs {plot_right_y} corr.png', 
-                    dpi=600, bbox_inches = "tight")
+        plt.savefig(file_path, dpi=600, bbox_inches = "tight")
+        save_figure_cache_key(file_path, cache_key if figure_cache else None)
           
     
 def enforce_astro_num(astro_id):